@@ -0,0 +1,271 @@
+import networkx as nx
+import numpy as np
+
+import generators
+
+#edge attribute dicts handed out by ArrayGraph.adj, shared and read only (healing edges carry healing=True like the
+#edges dash.dash adds to a networkx graph)
+NATURAL = {}
+HEALING = {'healing': True}
+
+#compact graph backend for the deletion/healing loop. nodes are the integers 0..n-1 and are tombstoned (not compacted)
+#when deleted. the starting edges are held once in CSR form (indptr/indices, neighbours sorted per node) and never
+#change, dead neighbours are skipped via the alive mask. edges added later (healing edges) live in small per-node dicts.
+#node attributes (delta, dashID, initial_dashID, degree) are numpy arrays.
+#it implements the slice of the networkx Graph API that the simulator, dash.dash and the connectivity tracker use, so
+#the same code runs on either backend. convert with to_networkx() for export and drawing.
+class ArrayGraph:
+    def __init__(self, n, edges, delta=None, dash_id=None, initial_dash_id=None, pos=None):
+        edges = generators.canonical_edges(edges)
+        index_type = np.int32 if n < 2**31 else np.int64
+
+        #CSR adjacency with both directions of every edge
+        sources = np.concatenate((edges[:, 0], edges[:, 1]))
+        targets = np.concatenate((edges[:, 1], edges[:, 0]))
+        order = np.lexsort((targets, sources))
+        self.indices = targets[order].astype(index_type)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n), out=self.indptr[1:])
+
+        self.n = n
+        self.alive = np.ones(n, dtype=bool)
+        self.count = n #number of alive nodes
+        self.degree_array = np.diff(self.indptr).astype(np.int64)
+        self.added = {} #node -> {neighbour: is_healing} for edges added after construction
+
+        #alive nodes packed at the front of order, slot[node] is the node's position in it, for O(1) random picks
+        self.order = np.arange(n, dtype=index_type)
+        self.slot = np.arange(n, dtype=index_type)
+
+        self.delta = np.zeros(n, dtype=np.int64) if delta is None else np.asarray(delta, dtype=np.int64).copy()
+        self.dash_id = np.zeros(n) if dash_id is None else np.asarray(dash_id, dtype=float).copy()
+        self.initial_dash_id = self.dash_id.copy() if initial_dash_id is None else np.asarray(initial_dash_id, dtype=float).copy()
+        self.pos = None if pos is None else np.asarray(pos, dtype=float)
+
+        self.nodes = NodeView(self)
+        self.adj = AdjacencyView(self)
+
+    @classmethod
+    def from_generated(cls, graph):
+        #graph is the dict returned by generators.generate
+        return cls(graph["n"], graph["edges"], graph["delta"], graph["dashID"], graph["initial_dashID"], graph["pos"])
+
+    @classmethod
+    def from_networkx(cls, G):
+        #node labels are replaced by 0..n-1 in G's node order
+        nodes = list(G.nodes())
+        index = {node: i for i, node in enumerate(nodes)}
+        natural = [(index[u], index[v]) for u, v, healing in G.edges(data='healing') if not healing]
+        graph = cls(len(nodes), np.array(natural, dtype=np.int64).reshape(-1, 2),
+                    [G.nodes[node].get('delta', 0) for node in nodes],
+                    [G.nodes[node].get('dashID', 0.0) for node in nodes],
+                    [G.nodes[node].get('initial_dashID', G.nodes[node].get('dashID', 0.0)) for node in nodes])
+        for u, v, healing in G.edges(data='healing'):
+            if healing:
+                graph.add_edge(index[u], index[v], healing=True)
+        return graph
+
+    def to_networkx(self):
+        G = nx.Graph()
+        nodes = self.node_array()
+        G.add_nodes_from((node, {'delta': delta, 'dashID': dash_id, 'initial_dashID': initial})
+                         for node, delta, dash_id, initial in zip(nodes.tolist(), self.delta[nodes].tolist(), self.dash_id[nodes].tolist(), self.initial_dash_id[nodes].tolist()))
+        if self.pos is not None:
+            for node, xy in zip(nodes.tolist(), self.pos[nodes].tolist()):
+                G.nodes[node]['pos'] = tuple(xy)
+        natural, healing = self.edge_arrays()
+        G.add_edges_from(natural.tolist())
+        G.add_edges_from(healing.tolist(), healing=True)
+        return G
+
+    #--- networkx style API ---
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, node):
+        return 0 <= node < self.n and bool(self.alive[node])
+
+    def __iter__(self):
+        return iter(self.node_array().tolist())
+
+    def number_of_nodes(self):
+        return self.count
+
+    def number_of_edges(self):
+        return int(self.degree_array[self.alive].sum()) // 2
+
+    def node_array(self):
+        return np.flatnonzero(self.alive)
+
+    def natural_neighbors(self, node):
+        neighbours = self.indices[self.indptr[node]:self.indptr[node + 1]]
+        return neighbours[self.alive[neighbours]].tolist()
+
+    def neighbors(self, node):
+        added = self.added.get(node)
+        if added:
+            return iter(self.natural_neighbors(node) + list(added))
+        return iter(self.natural_neighbors(node))
+
+    def degree(self, node=None):
+        if node is not None:
+            return int(self.degree_array[node])
+        nodes = self.node_array()
+        return zip(nodes.tolist(), self.degree_array[nodes].tolist())
+
+    def has_edge(self, u, v):
+        if u not in self or v not in self:
+            return False
+        added = self.added.get(u)
+        if added and v in added:
+            return True
+        lo = self.indptr[u]
+        hi = self.indptr[u + 1]
+        i = lo + np.searchsorted(self.indices[lo:hi], v)
+        return i < hi and self.indices[i] == v
+
+    def add_edge(self, u, v, healing=False):
+        if self.has_edge(u, v):
+            return
+        self.added.setdefault(u, {})[v] = healing
+        self.added.setdefault(v, {})[u] = healing
+        self.degree_array[u] += 1
+        self.degree_array[v] += 1
+
+    def remove_node(self, node):
+        if node not in self:
+            raise nx.NetworkXError(f"The node {node} is not in the graph.")
+        neighbours = self.indices[self.indptr[node]:self.indptr[node + 1]]
+        neighbours = neighbours[self.alive[neighbours]]
+        self.degree_array[neighbours] -= 1
+        for neighbour in self.added.pop(node, {}):
+            del self.added[neighbour][node]
+            if not self.added[neighbour]:
+                del self.added[neighbour]
+            self.degree_array[neighbour] -= 1
+
+        self.alive[node] = False
+        self.degree_array[node] = 0
+        #swap the last alive node into the deleted node's slot
+        last = self.order[self.count - 1]
+        slot = self.slot[node]
+        self.order[slot] = last
+        self.slot[last] = slot
+        self.count -= 1
+
+    def set_alive(self, nodes):
+        #tombstone every node not in nodes (which must have no edges left), nodes are given in random_node order, e.g.
+        #the order[:count] of an earlier state of this graph
+        nodes = np.asarray(nodes, dtype=self.order.dtype)
+        self.alive[:] = False
+        self.alive[nodes] = True
+        self.degree_array[~self.alive] = 0
+        dead = np.flatnonzero(~self.alive).astype(self.order.dtype)
+        self.order = np.concatenate((nodes, dead))
+        self.slot[self.order] = np.arange(self.n, dtype=self.slot.dtype)
+        self.count = len(nodes)
+
+    def random_node(self, rng):
+        #uniform alive node in O(1), rng is a random.Random
+        return int(self.order[rng.randrange(self.count)])
+
+    def edges(self, data=None):
+        natural, healing = self.edge_arrays()
+        if data == 'healing':
+            return [(u, v, None) for u, v in natural.tolist()] + [(u, v, True) for u, v in healing.tolist()]
+        return [tuple(edge) for edge in natural.tolist()] + [tuple(edge) for edge in healing.tolist()]
+
+    def csr_edges(self):
+        #starting edges between alive nodes as a (k, 2) array, each edge once
+        sources = np.repeat(np.arange(self.n, dtype=self.indices.dtype), np.diff(self.indptr))
+        keep = (sources < self.indices) & self.alive[sources] & self.alive[self.indices]
+        return np.column_stack((sources[keep], self.indices[keep])).astype(np.int64)
+
+    def edge_arrays(self):
+        #(natural, healing) edges between alive nodes as (k, 2) arrays, each edge once
+        #the added edges are gathered as flat (u, v, is_healing) values and turned into one array
+        added = [value for u, neighbours in self.added.items() for v, is_healing in neighbours.items() if u < v for value in (u, v, is_healing)]
+        added = np.array(added, dtype=np.int64).reshape(-1, 3)
+        healing = added[:, 2].astype(bool)
+        return np.concatenate((self.csr_edges(), added[~healing, :2])), added[healing, :2]
+
+    def connected_components(self):
+        natural, healing = self.edge_arrays()
+        roots = generators.component_roots(self.n, np.concatenate((natural, healing)))
+        nodes = self.node_array()
+        roots = roots[nodes]
+        order = np.argsort(roots, kind='stable')
+        splits = np.flatnonzero(np.diff(roots[order])) + 1
+        return [set(group.tolist()) for group in np.split(nodes[order], splits)]
+
+#G.nodes / G.nodes() / G.nodes[node]['delta'] for ArrayGraph
+class NodeView:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __call__(self, data=False):
+        return list(self.graph)
+
+    def __iter__(self):
+        return iter(self.graph)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def __contains__(self, node):
+        return node in self.graph
+
+    def __getitem__(self, node):
+        if node not in self.graph:
+            raise KeyError(node)
+        return NodeAttributes(self.graph, node)
+
+#dict-like view of one node's attributes, reading and writing the graph's arrays
+class NodeAttributes:
+    __slots__ = ("graph", "node")
+
+    def __init__(self, graph, node):
+        self.graph = graph
+        self.node = node
+
+    def __getitem__(self, key):
+        graph = self.graph
+        if key == 'delta':
+            return int(graph.delta[self.node])
+        if key == 'dashID':
+            return float(graph.dash_id[self.node])
+        if key == 'initial_dashID':
+            return float(graph.initial_dash_id[self.node])
+        if key == 'pos' and graph.pos is not None:
+            return tuple(graph.pos[self.node].tolist())
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        graph = self.graph
+        if key == 'delta':
+            graph.delta[self.node] = value
+        elif key == 'dashID':
+            graph.dash_id[self.node] = value
+        elif key == 'initial_dashID':
+            graph.initial_dash_id[self.node] = value
+        else:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+#G.adj[node] for ArrayGraph: neighbour -> edge attribute dict
+class AdjacencyView:
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, node):
+        graph = self.graph
+        neighbours = dict.fromkeys(graph.natural_neighbors(node), NATURAL)
+        for neighbour, healing in graph.added.get(node, {}).items():
+            neighbours[neighbour] = HEALING if healing else NATURAL
+        return neighbours
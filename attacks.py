@@ -0,0 +1,198 @@
+import heapq
+import logging
+
+from connectivity import local_components
+
+logger = logging.getLogger(__name__)
+
+ATTACKS = ("articulation", "bridge")
+REFRESH_FRACTION = 0.05 #a full pass is allowed again once this share of the remaining nodes has been deleted
+CHECK_LIMIT = 1000 #nodes a local check may expand before its candidate is left to the next full pass
+
+#cut vertices (articulation points) and bridges of a graph in one iterative depth first pass (Tarjan's low-link)
+def cut_structure(graph):
+    depth = {}
+    low = {}
+    cut_vertices = set()
+    bridges = []
+    for root in graph:
+        if root in depth:
+            continue
+        depth[root] = low[root] = 0
+        children = 0
+        stack = [(root, None, iter(graph.neighbors(root)))]
+        while stack:
+            node, parent, neighbours = stack[-1]
+            for neighbour in neighbours:
+                if neighbour not in depth:
+                    depth[neighbour] = low[neighbour] = depth[node] + 1
+                    stack.append((neighbour, node, iter(graph.neighbors(neighbour))))
+                    break
+                if neighbour != parent:
+                    low[node] = min(low[node], depth[neighbour])
+            else: #every neighbour seen, report back to the parent
+                stack.pop()
+                if parent is None:
+                    continue
+                low[parent] = min(low[parent], low[node])
+                if low[node] > depth[parent]:
+                    bridges.append((parent, node))
+                if parent == root:
+                    children += 1
+                elif low[node] >= depth[parent]:
+                    cut_vertices.add(parent)
+        if children > 1:
+            cut_vertices.add(root)
+    return cut_vertices, bridges
+
+#local checks, a search from the node's neighbours (or the edge's endpoints) with the node (edge) left out. the searches
+#stop as soon as they meet or one of them runs out, so a check costs about the size of the smallest side, not the whole
+#graph. with limit, None is returned when the check would need to expand more nodes than that
+def is_cut_vertex(graph, node, limit=None):
+    neighbours = list(graph.neighbors(node))
+    if len(neighbours) < 2:
+        return False
+    closed = local_components(graph, neighbours, lambda other: (w for w in graph.neighbors(other) if w != node), first=True, limit=limit)
+    return None if closed is None else bool(closed)
+
+def is_bridge(graph, u, v, limit=None):
+    if not set(graph.neighbors(u)).isdisjoint(graph.neighbors(v)): #on a triangle, the common case after healing
+        return False
+    def neighbors(node):
+        skip = v if node == u else u if node == v else None
+        return (w for w in graph.neighbors(node) if w != skip)
+    closed = local_components(graph, [u, v], neighbors, first=True, limit=limit)
+    return None if closed is None else bool(closed)
+
+#targets for the structure aware attacks of a Simulator: cut vertices ("articulation") or the better connected endpoint
+#of a bridge ("bridge"), highest degree first. one full pass finds the starting candidates. after that, every deletion
+#and healing step only adds the nodes (edges) around the change as suspects, and candidates are verified with a local
+#check when they come up, so picking a target usually needs no pass over the whole graph. two cases fall back to a full
+#pass: candidates whose check runs over CHECK_LIMIT (both sides of the cut are big) and cut vertices that appear far
+#from any change (e.g. a long cycle cut open). the first runs a pass when nothing cheaper is left, the second when the
+#candidates are used up, at most once per REFRESH_FRACTION of the remaining nodes deleted, and before take() reports
+#that there is nothing left to attack. a pass that finds nothing marks the graph as exhausted: until the next refresh
+#(or a deferred check) only the suspects queued by deletions and healing are checked, so a 2-connected graph doesn't
+#get a full pass on every step.
+class StructureTargets:
+    def __init__(self, simulator, kind):
+        if kind not in ATTACKS:
+            raise ValueError(f"Unknown attack: {kind}")
+        self.simulator = simulator
+        self.kind = kind
+        self.heap = [] #(-priority, tiebreak, candidate)
+        self.priority = {} #candidate -> priority of its newest heap entry, older entries are skipped
+        self.counter = 0
+        self.removed_since_pass = None #None until the first full pass
+        self.exhausted = False #the last full pass found no candidates
+        self.passes = 0
+
+    def push(self, candidate):
+        degree = self.simulator.degree_index
+        if self.kind == "articulation":
+            priority = degree[candidate]
+        else:
+            priority = max(degree[candidate[0]], degree[candidate[1]])
+        if self.priority.get(candidate) == priority:
+            return
+        self.priority[candidate] = priority
+        self.counter += 1
+        heapq.heappush(self.heap, (-priority, self.counter, candidate))
+
+    def push_edges(self, node):
+        for neighbour in self.simulator.G.neighbors(node):
+            self.push((min(node, neighbour), max(node, neighbour)))
+
+    def full_pass(self):
+        self.heap = []
+        self.priority = {}
+        cut_vertices, bridges = cut_structure(self.simulator.G)
+        for candidate in (cut_vertices if self.kind == "articulation" else bridges):
+            self.push(candidate if self.kind == "articulation" else (min(candidate), max(candidate)))
+        self.removed_since_pass = 0
+        self.exhausted = not self.heap
+        self.passes += 1
+        logger.debug("Full %s pass: %s candidates", self.kind, len(self.heap))
+
+    #hooks called by the Simulator as it changes the graph
+    def node_removed(self, node, neighbours):
+        #after node was removed, neighbours are the nodes it was connected to
+        if self.removed_since_pass is None:
+            return
+        self.removed_since_pass += 1
+        self.priority.pop(node, None)
+        G = self.simulator.G
+        for neighbour in neighbours:
+            if self.kind == "articulation":
+                self.push(neighbour)
+                if G.degree(neighbour) == 1: #a new leaf, the node it hangs from is a cut vertex two hops from the change
+                    self.push(next(iter(G.neighbors(neighbour))))
+            else:
+                self.push_edges(neighbour)
+
+    def edges_added(self, edges):
+        if self.removed_since_pass is None:
+            return
+        for u, v in edges:
+            for node in (u, v):
+                if self.kind == "articulation":
+                    self.push(node)
+                else:
+                    self.push_edges(node) #includes the new edge itself, which is a bridge if it joined two components
+
+    def valid(self, candidate):
+        #True/False, or None if the local check was too expensive
+        G = self.simulator.G
+        if self.kind == "articulation":
+            return candidate in G and is_cut_vertex(G, candidate, CHECK_LIMIT)
+        u, v = candidate
+        return u in G and v in G and G.has_edge(u, v) and is_bridge(G, u, v, CHECK_LIMIT)
+
+    def target_node(self, candidate):
+        if self.kind == "articulation":
+            return candidate
+        degree = self.simulator.degree_index
+        u, v = candidate
+        return u if degree[u] >= degree[v] else v
+
+    def pop(self):
+        #best candidate with a current heap entry, None if there is none
+        while self.heap:
+            key, _, candidate = heapq.heappop(self.heap)
+            if self.priority.get(candidate) == -key: #otherwise superseded by a newer entry, or already checked
+                del self.priority[candidate]
+                return candidate
+        return None
+
+    def take(self, k=1):
+        #up to k target nodes, best first. raises IndexError if there is nothing to attack
+        targets = []
+        deferred = False
+        while len(targets) < k:
+            candidate = self.pop()
+            if candidate is None:
+                break
+            valid = self.valid(candidate)
+            if valid is None:
+                deferred = True #dropped for now, the full pass finds it again if it still is a target
+            elif valid and self.target_node(candidate) not in targets:
+                targets.append(self.target_node(candidate))
+
+        #a full pass is also made before giving up, since cut vertices far from any change are only found by one. not if
+        #the last pass already came up empty, then the suspects checked above are all that can have changed
+        if len(targets) < k and (deferred or self.refresh_allowed() or (not targets and not self.exhausted)):
+            self.full_pass()
+            while len(targets) < k: #straight from the pass, the graph hasn't changed since
+                candidate = self.pop()
+                if candidate is None:
+                    break
+                if self.target_node(candidate) not in targets:
+                    targets.append(self.target_node(candidate))
+        if not targets:
+            raise IndexError(f"No {self.kind} targets left in the graph.")
+        return targets
+
+    def refresh_allowed(self):
+        if self.removed_since_pass is None:
+            return True
+        return self.removed_since_pass >= max(1, int(REFRESH_FRACTION * len(self.simulator.G)))
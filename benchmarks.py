@@ -0,0 +1,227 @@
+import argparse
+import io
+import json
+import logging
+import sys
+import time
+import tracemalloc
+
+import networkx as nx
+import numpy as np
+
+import dash
+import generators
+import layouts
+from arraygraph import ArrayGraph
+from simulator import BACKENDS, Simulator
+from trials import format_summary
+
+#benchmarks for the hot paths of a depletion run: graph generation, partition, get_healing_neighbors,
+#handle_deletion, the DASH healing step (plus dash.dash on a worst case neighbourhood where every neighbour has the same
+#delta), per step stats, a step of the articulation and bridge attacks, the force layout and drawing/saving a frame. every case is timed per call and reported as latency percentiles,
+#the heavy phases also get their peak traced memory. results can be saved as a baseline, and later runs compared
+#against it to flag regressions:
+#   python benchmarks.py -n 100 10000 1000000 --save-baseline bench.json
+#   python benchmarks.py -n 100 10000 1000000 --compare bench.json
+
+def percentiles(samples):
+    samples = np.asarray(samples, dtype=float) * 1e6 #microseconds
+    return {
+        "calls": len(samples),
+        "p50_us": float(np.percentile(samples, 50)),
+        "p90_us": float(np.percentile(samples, 90)),
+        "p99_us": float(np.percentile(samples, 99)),
+        "max_us": float(samples.max()),
+    }
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    function(*args, **kwargs)
+    return time.perf_counter() - start
+
+def peak_memory(function, *args):
+    #peak memory traced while function runs, in MB. run separately from the timings, tracing slows everything down
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+def generate(n, model, backend, seed, layout=False):
+    simulator = Simulator(seed=seed)
+    simulator.generate_graph(n, layout=layout, model=model, backend=backend)
+    return simulator
+
+def run_steps(simulator, steps):
+    for _ in range(steps):
+        simulator.delete_random_node()
+        simulator.DASH_healingstep()
+        simulator.stats()
+
+def attack_step(simulator, attack):
+    simulator.handle_deletion(simulator.next_victim(attack))
+    simulator.DASH_healingstep()
+
+#DASH on a star: the hub is deleted and all k leaves, with equal delta, go into one reconstruction tree
+def equal_delta_star(k, backend):
+    edges = np.column_stack((np.zeros(k, dtype=np.int64), np.arange(1, k + 1, dtype=np.int64)))
+    dash_ids = np.linspace(0, 1, k + 1)
+    if backend == "array":
+        G = ArrayGraph(k + 1, edges, np.zeros(k + 1, dtype=np.int64), dash_ids)
+    else:
+        G = nx.Graph()
+        G.add_nodes_from((node, {'delta': 0, 'dashID': dash_ids[node], 'initial_dashID': dash_ids[node]}) for node in range(k + 1))
+        G.add_edges_from(edges.tolist())
+    G.remove_node(0)
+    return G, list(range(1, k + 1))
+
+
+def bench(n, model, backend, steps=200, seed=0, draw_limit=100000, draw_steps=10, memory=True):
+    rows = []
+    def row(case, samples, peak=None):
+        rows.append(dict(case=case, model=model, backend=backend, nodes=n, **percentiles(samples), peak_mb=peak))
+
+    #generation (includes connecting the components)
+    repeats = 3 if n <= 10000 else 1
+    samples = [timed(generate, n, model, backend, seed + r) for r in range(repeats)]
+    row("generate", samples, peak_memory(generate, n, model, backend, seed) if memory else None)
+
+    #one run of random deletions, every phase timed on its own. picking the victim is part of delete_random_node (and of
+    #the step), partition and get_healing_neighbors are timed on the picked victim before it is deleted
+    simulator = generate(n, model, backend, seed)
+    steps = max(1, min(steps, n - 2))
+    phases = {name: [] for name in ("choose_node", "partition", "get_healing_neighbors", "handle_deletion", "delete_random_node", "heal", "stats", "step")}
+    for _ in range(steps):
+        start = time.perf_counter()
+        node = simulator.choose_node("random")
+        choose = time.perf_counter() - start
+        phases["partition"].append(timed(simulator.partition, node))
+        phases["get_healing_neighbors"].append(timed(simulator.get_healing_neighbors, node))
+        delete = timed(simulator.handle_deletion, node)
+        heal = timed(simulator.DASH_healingstep)
+        stats = timed(simulator.stats)
+        phases["choose_node"].append(choose)
+        phases["handle_deletion"].append(delete)
+        phases["delete_random_node"].append(choose + delete)
+        phases["heal"].append(heal)
+        phases["stats"].append(stats)
+        phases["step"].append(choose + delete + heal + stats)
+    for name, samples in phases.items():
+        peak = None
+        if name == "step" and memory:
+            peak = peak_memory(run_steps, simulator, min(steps, len(simulator.G) - 1)) if len(simulator.G) > 1 else None
+        row(name, samples, peak)
+
+    #steps of the structure aware attacks (attacks.py). a full pass over the graph shows up in the tail, a pass on every
+    #step (e.g. once a graph has no cut vertex left) would show up in the median
+    for attack in ("articulation", "bridge"):
+        simulator = generate(n, model, backend, seed)
+        row(f"{attack}_step", [timed(attack_step, simulator, attack) for _ in range(steps)])
+
+    #worst case reconstruction tree: a star of up to 10000 leaves that all have the same delta. the star is built before
+    #the timer starts, dash.dash changes it so every call gets a fresh one
+    k = min(n - 1, 10000)
+    samples = [timed(dash.dash, G, 0, leaves) for G, leaves in (equal_delta_star(k, backend) for _ in range(5))]
+    peak = None
+    if memory:
+        G, leaves = equal_delta_star(k, backend)
+        peak = peak_memory(dash.dash, G, 0, leaves)
+    row("dash_equal_delta", samples, peak)
+
+    if n <= draw_limit:
+        #force layout from random positions (the whole 30 iterations per call). its cost grows with the node pairs that
+        #share a mesh cell, so a mesh stretched by a few outlying nodes shows up here
+        graph = generators.generate(model, n, np.random.default_rng(seed))
+        samples = [timed(layouts.force_layout, n, graph["edges"], rng=np.random.default_rng(seed + r)) for r in range(repeats)]
+        row("force_layout", samples)
+        rows.extend(bench_drawing(n, model, backend, min(steps, draw_steps), seed, memory))
+    return rows
+
+def bench_drawing(n, model, backend, steps, seed, memory):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg #rendering is only imported when it is benchmarked
+    from renderer import GraphRenderer
+
+    simulator = generate(n, model, backend, seed, layout=True)
+    renderer = GraphRenderer(blit=False)
+    renderer.attach(FigureCanvasAgg(renderer.fig))
+    renderer.reset(simulator)
+
+    draw = []
+    save = []
+    steps = max(1, min(steps, n - 2))
+    for _ in range(steps):
+        simulator.delete_random_node()
+        simulator.DASH_healingstep()
+        draw.append(timed(renderer.update, simulator))
+        save.append(timed(renderer.savefig, io.BytesIO(), format='png'))
+
+    rows = []
+    for case, samples in (("draw", draw), ("savefig", save)):
+        peak = peak_memory(renderer.update, simulator) if memory and case == "draw" else None
+        #named after the level of detail (renderer.py), so each mode has its own baseline entries
+        rows.append(dict(case=f"{case}_{renderer.mode}", model=model, backend=backend, nodes=n, **percentiles(samples), peak_mb=peak))
+    return rows
+
+def row_key(row):
+    return f"{row['case']}/{row['model']}/{row['backend']}/{row['nodes']}"
+
+def compare(rows, baseline, threshold=0.25, floor_us=20.0):
+    #a case regresses when its median latency (or peak memory) grew by more than threshold over the baseline.
+    #differences below floor_us are timer noise and never count
+    base = {row_key(row): row for row in baseline}
+    regressions = []
+    for row in rows:
+        old = base.get(row_key(row))
+        if old is None:
+            continue
+        if row["p50_us"] > old["p50_us"] * (1 + threshold) and row["p50_us"] - old["p50_us"] > floor_us:
+            regressions.append(f"{row_key(row)}: p50 {old['p50_us']:.1f} -> {row['p50_us']:.1f} us")
+        if row["peak_mb"] is not None and old.get("peak_mb") is not None and row["peak_mb"] > old["peak_mb"] * (1 + threshold):
+            regressions.append(f"{row_key(row)}: peak memory {old['peak_mb']:.1f} -> {row['peak_mb']:.1f} MB")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the deletion, healing, stats and rendering hot paths.")
+    parser.add_argument("-n", "--nodes", type=int, nargs="+", default=[100, 1000, 10000, 100000, 1000000], help="graph sizes")
+    parser.add_argument("-m", "--models", nargs="+", choices=generators.MODELS, default=["geometric", "barabasi_albert"], help="random graph models (degree distributions)")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="networkx", help="graph storage")
+    parser.add_argument("--steps", type=int, default=200, help="deletion/healing steps timed per graph")
+    parser.add_argument("--draw-limit", type=int, default=100000, help="largest graph that drawing is benchmarked on (the default covers the labels, points and density modes)")
+    parser.add_argument("--draw-steps", type=int, default=10, help="frames drawn and saved per graph (full redraws are slow)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for graph generation and deletions")
+    parser.add_argument("--no-memory", action="store_true", help="skip the (slow) peak memory measurements")
+    parser.add_argument("-o", "--out", default=None, help="write the results to this JSON file")
+    parser.add_argument("--save-baseline", default=None, help="store the results as a baseline JSON file")
+    parser.add_argument("--compare", default=None, help="baseline JSON file to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown/memory growth counted as a regression")
+    parser.add_argument("--floor-us", type=float, default=20.0, help="slowdowns smaller than this many microseconds are ignored as noise")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    rows = []
+    for n in args.nodes:
+        for model in args.models:
+            print(f"benchmarking {model} with {n} nodes ...", file=sys.stderr)
+            rows.extend(bench(n, model, args.backend, args.steps, args.seed, args.draw_limit, args.draw_steps, not args.no_memory))
+
+    print(format_summary(rows))
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w", encoding='utf-8') as file:
+                json.dump(rows, file, indent=1)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as file:
+            regressions = compare(rows, json.load(file), args.threshold, args.floor_us)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+import argparse
+import json
+import logging
+import os
+from collections import deque
+
+import networkx as nx
+import numpy as np
+
+from arraygraph import ArrayGraph
+from attacks import ATTACKS, StructureTargets
+from connectivity import ArrayConnectivityTracker, ConnectivityTracker
+from eventlog import read_events
+from priorityindex import ArrayBucketQueue, BucketQueue, NodeSampler
+
+logger = logging.getLogger(__name__)
+
+#checkpoints: the complete state of a Simulator in one compressed .npz file (graph, node attributes, healing edges,
+#the last deletion that DASH_healingstep works from, the RNG state, the attack candidates and the progress of a run),
+#so long runs can be stopped and resumed exactly, and any step can be inspected without redoing the run.
+#replay: applies the delete/heal records of an event log (see eventlog.py) to a restored state. victims are taken from
+#the log instead of being chosen again, and observers (rendering, logging) are not called, so jumping to step k only
+#costs the graph work of the steps in between. the only choices made again are the random draws, see replay().
+
+FORMAT = 1
+
+#the edges of a graph in an order that reproduces every node's neighbour order when they are added one by one with
+#add_edge. adjacency maps node -> neighbours in iteration order. this is a topological sort over "edge a comes before
+#edge b in some node's neighbour list"; the history that built the graph is one valid answer, so one always exists.
+#neighbour order matters because the maxneighbour strategy picks from it
+def creation_order(adjacency):
+    position = {}
+    waiting = {} #edge -> number of edges that have to be added before it
+    for node, neighbours in adjacency.items():
+        for i, neighbour in enumerate(neighbours):
+            edge = (min(node, neighbour), max(node, neighbour))
+            position[node, neighbour] = i
+            waiting[edge] = waiting.get(edge, 0) + (i > 0)
+
+    ready = deque(edge for edge, count in waiting.items() if count == 0)
+    order = []
+    while ready:
+        edge = ready.popleft()
+        order.append(edge)
+        for node, neighbour in (edge, edge[::-1]):
+            neighbours = adjacency[node]
+            i = position[node, neighbour] + 1
+            if i < len(neighbours):
+                following = (min(node, neighbours[i]), max(node, neighbours[i]))
+                waiting[following] -= 1
+                if waiting[following] == 0:
+                    ready.append(following)
+    return order
+
+#None-able integers are stored as -1 (node ids and steps are never negative)
+def optional(value):
+    return -1 if value is None else value
+
+def restored(value):
+    value = int(value)
+    return None if value == -1 else value
+
+#attack candidates (attacks.StructureTargets) as arrays: the heap in list order and the current priorities. candidates
+#are nodes for articulation and (u, v) edges for bridge, both stored as pairs with -1 as the second node of a node
+def candidate_pairs(candidates):
+    return np.array([candidate if isinstance(candidate, tuple) else (candidate, -1) for candidate in candidates], dtype=np.int64).reshape(-1, 2)
+
+def candidate_list(pairs):
+    return [u if v == -1 else (u, v) for u, v in pairs.tolist()]
+
+def save_targets(targets):
+    return {
+        "heap_keys": np.array([(key, counter) for key, counter, _ in targets.heap], dtype=np.int64).reshape(-1, 2),
+        "heap_candidates": candidate_pairs(candidate for _, _, candidate in targets.heap),
+        "priority_candidates": candidate_pairs(targets.priority),
+        "priority": np.array(list(targets.priority.values()), dtype=np.int64),
+        "counter": targets.counter,
+        "removed_since_pass": optional(targets.removed_since_pass),
+        "exhausted": targets.exhausted,
+    }
+
+def load_targets(simulator, kind, state):
+    targets = StructureTargets(simulator, kind)
+    targets.heap = [(key, counter, candidate) for (key, counter), candidate in zip(state["heap_keys"].tolist(), candidate_list(state["heap_candidates"]))]
+    targets.priority = dict(zip(candidate_list(state["priority_candidates"]), state["priority"].tolist()))
+    targets.counter = int(state["counter"])
+    targets.removed_since_pass = restored(state["removed_since_pass"])
+    targets.exhausted = bool(state["exhausted"]) if "exhausted" in state else False
+    return targets
+
+def save_checkpoint(simulator, path):
+    G = simulator.G
+    if isinstance(G, ArrayGraph):
+        nodes = G.order[:G.count].astype(np.int64) #random_node order
+        csr_edges = G.csr_edges() #rebuilt as CSR, their neighbour order is always ascending
+        edges = creation_order({node: list(neighbours) for node, neighbours in G.added.items()})
+        healing = [G.added[u][v] for u, v in edges]
+        size = G.n
+    else:
+        nodes = np.array(list(G.nodes()), dtype=np.int64) #iteration order, full passes (attacks.py) walk the graph in it
+        csr_edges = np.empty((0, 2), dtype=np.int64)
+        edges = creation_order({node: list(G.adj[node]) for node in G.nodes()})
+        healing = [bool(G.edges[u, v].get('healing')) for u, v in edges]
+        size = int(nodes.max()) + 1 if len(nodes) else 0
+
+    attributes = [G.nodes[node] for node in nodes.tolist()]
+    version, internal, gauss = simulator.rng.getstate()
+    connectivity = simulator.connectivity
+    last_neighbours = simulator.last_deleted_node_neighbours_list
+    last_healing_neighbours = simulator.last_deleted_node_healing_neighbours
+    state = {
+        "format": FORMAT,
+        "backend": "array" if isinstance(G, ArrayGraph) else "networkx",
+        "size": size,
+        "nodes": nodes,
+        "delta": np.array([a['delta'] for a in attributes], dtype=np.int64),
+        "dashID": np.array([a['dashID'] for a in attributes], dtype=float),
+        "initial_dashID": np.array([a['initial_dashID'] for a in attributes], dtype=float),
+        "csr_edges": csr_edges,
+        "edges": np.array(edges, dtype=np.int64).reshape(-1, 2),
+        "healing": np.array(healing, dtype=bool),
+        "pos_nodes": np.array(list(simulator.pos), dtype=np.int64),
+        "pos": np.array(list(simulator.pos.values()), dtype=float).reshape(-1, 2),
+        "sampler_order": np.array(simulator.node_sampler.order if simulator.node_sampler is not None else [], dtype=np.int64), #random_node order
+        "degree_order": np.array(simulator.degree_index.ordered_keys(), dtype=np.int64),
+        "delta_order": np.array(simulator.delta_index.ordered_keys(), dtype=np.int64),
+        "step": simulator.step,
+        "healcount": simulator.healcount,
+        "last_deleted_node": optional(simulator.last_deleted_node),
+        "last_neighbours": np.array(last_neighbours or [], dtype=np.int64),
+        "has_last_neighbours": last_neighbours is not None,
+        "last_healing_neighbours": np.array(last_healing_neighbours or [], dtype=np.int64),
+        "has_last_healing_neighbours": last_healing_neighbours is not None,
+        "last_new_edges": np.array(simulator.last_new_edges, dtype=np.int64).reshape(-1, 2),
+        "first_disconnect_step": optional(connectivity.first_disconnect_step),
+        "first_disconnect_nodes": optional(connectivity.first_disconnect_nodes),
+        "rng_version": version,
+        "rng_state": np.array(internal, dtype=np.uint64),
+        "rng_gauss": np.nan if gauss is None else gauss,
+        "progress": json.dumps(simulator.progress),
+    }
+    for kind, targets in simulator.targets.items(): #the pending candidates decide the next victims of these attacks
+        for key, value in save_targets(targets).items():
+            state[f"targets_{kind}_{key}"] = value
+
+    #written next to the target first, so a crash while saving never leaves a broken checkpoint behind
+    temporary = path + ".tmp.npz"
+    np.savez_compressed(temporary, **state)
+    os.replace(temporary, path)
+
+def load_checkpoint(path, simulator):
+    #restores the state saved in path into simulator (its observers are kept) and returns it
+    with np.load(path) as data:
+        state = {key: data[key] for key in data.files}
+    if int(state["format"]) != FORMAT:
+        raise ValueError(f"Unsupported checkpoint format {int(state['format'])} in {path}")
+
+    nodes = state["nodes"]
+    edges = state["edges"].tolist()
+    healing = state["healing"].tolist()
+    if str(state["backend"]) == "array":
+        size = int(state["size"])
+        attributes = []
+        for key in ("delta", "dashID", "initial_dashID"):
+            values = np.zeros(size, dtype=state[key].dtype)
+            values[nodes] = state[key]
+            attributes.append(values)
+        G = ArrayGraph(size, state["csr_edges"], *attributes)
+        G.set_alive(nodes)
+        for (u, v), is_healing in zip(edges, healing):
+            G.add_edge(u, v, healing=is_healing)
+        degree_index = ArrayBucketQueue(G.degree_array, state["degree_order"])
+        delta_index = ArrayBucketQueue(G.delta, state["delta_order"])
+        node_sampler = None
+    else:
+        G = nx.Graph()
+        G.add_nodes_from((node, {'delta': delta, 'dashID': dash_id, 'initial_dashID': initial})
+                         for node, delta, dash_id, initial in zip(nodes.tolist(), state["delta"].tolist(), state["dashID"].tolist(), state["initial_dashID"].tolist()))
+        for (u, v), is_healing in zip(edges, healing):
+            if is_healing:
+                G.add_edge(u, v, healing=True)
+            else:
+                G.add_edge(u, v)
+        degree_index = BucketQueue((node, G.degree(node)) for node in state["degree_order"].tolist())
+        delta_index = BucketQueue((node, G.nodes[node]['delta']) for node in state["delta_order"].tolist())
+        node_sampler = NodeSampler(state["sampler_order"].tolist() if "sampler_order" in state else nodes.tolist())
+
+    simulator.G = G
+    simulator.degree_index = degree_index
+    simulator.delta_index = delta_index
+    simulator.node_sampler = node_sampler
+    simulator.connectivity = ArrayConnectivityTracker(G) if isinstance(G, ArrayGraph) else ConnectivityTracker(G)
+    simulator.connectivity.first_disconnect_step = restored(state["first_disconnect_step"])
+    simulator.connectivity.first_disconnect_nodes = restored(state["first_disconnect_nodes"])
+    simulator.pos = dict(zip(state["pos_nodes"].tolist(), map(tuple, state["pos"].tolist())))
+
+    simulator.step = int(state["step"])
+    simulator.healcount = int(state["healcount"])
+    simulator.last_deleted_node = restored(state["last_deleted_node"])
+    simulator.last_deleted_node_neighbours_list = state["last_neighbours"].tolist() if state["has_last_neighbours"] else None
+    simulator.last_deleted_node_healing_neighbours = state["last_healing_neighbours"].tolist() if state["has_last_healing_neighbours"] else None
+    simulator.last_new_edges = [tuple(edge) for edge in state["last_new_edges"].tolist()]
+    simulator.last_deleted_nodes = []
+    simulator.last_round = []
+    simulator.targets = {}
+    for kind in ATTACKS:
+        prefix = f"targets_{kind}_"
+        if prefix + "heap_keys" in state:
+            simulator.targets[kind] = load_targets(simulator, kind, {key[len(prefix):]: value for key, value in state.items() if key.startswith(prefix)})
+
+    gauss = float(state["rng_gauss"])
+    simulator.rng.setstate((int(state["rng_version"]), tuple(state["rng_state"].tolist()), None if np.isnan(gauss) else gauss))
+    simulator.progress = json.loads(str(state["progress"]))
+    return simulator
+
+def check_victims(step, drawn, logged, verify):
+    if list(drawn) == list(logged):
+        return
+    message = f"Replay diverged from the event log after step {step}: the run's strategy picks {list(drawn)}, the log has {list(logged)}"
+    if verify:
+        raise ValueError(message)
+    logger.warning(message)
+
+def replay(simulator, events, until_step=None, verify=True):
+    #applies the recorded deletions and heals after the simulator's current step, up to and including until_step.
+    #events are event log records (e.g. read_events(path)). with verify, every heal is checked against the edges the
+    #log recorded, so a log that doesn't belong to this state is caught at the first step where they differ.
+    #the logged victims are deleted as they are. the RNG has to end up where the original run left it, so a replayed
+    #state can be saved and continued like any other checkpoint, and the RNG only has a state at the checkpoint: every
+    #victim that was drawn from it is drawn again and checked against the log. those are the victims of the random and
+    #maxneighbour strategies, and the random ones the other strategies fell back to ("fallback" in the log). max,
+    #articulation and bridge victims are not chosen again, which would cost a structure search per step for the attacks.
+    #their attack candidates are searched for afresh when the replayed state is continued
+    #returns the number of steps applied
+    observers = simulator.observers
+    simulator.observers = [] #nothing is rendered or logged while replaying
+    progress = simulator.progress or {}
+    strategy = progress.get("strategy")
+    batch = progress.get("batch", 1)
+    if strategy is None:
+        logger.warning("The checkpoint has no run strategy, replayed victims are not drawn and the RNG state stays as saved")
+    redraw = strategy in ("random", "maxneighbour") #strategies that draw from the RNG
+    first_step = simulator.step
+    applied = 0
+    deleted = None #node deleted by the last applied record (last victim of a round), until its heal record is applied
+    batched = False #whether that record was a deletion round
+    try:
+        for record in events:
+            event = record.get("event")
+            if event == "delete" and record["step"] > simulator.step:
+                if until_step is not None and record["step"] > until_step:
+                    break
+                if record["step"] != simulator.step + 1:
+                    raise ValueError(f"The event log has no deletion for step {simulator.step + 1}")
+                if redraw or (strategy is not None and record.get("fallback")):
+                    check_victims(simulator.step, [simulator.next_victim(strategy if redraw else "random")], [record["node"]], verify)
+                simulator.handle_deletion(record["node"])
+                deleted = record["node"]
+                batched = False
+            elif event == "round" and record["step"] > simulator.step:
+                if until_step is not None and record["step"] > until_step:
+                    break
+                if record["step"] - len(record["nodes"]) != simulator.step:
+                    raise ValueError(f"The event log has no deletion round starting after step {simulator.step}")
+                if redraw or (strategy is not None and record.get("fallback")):
+                    check_victims(simulator.step, simulator.next_round(strategy if redraw else "random", min(batch, len(simulator.G) - 1)), record["nodes"], verify)
+                simulator.handle_round(record["nodes"])
+                deleted = record["nodes"][-1]
+                batched = True
+            elif event == "heal" and deleted is not None and record["step"] == simulator.step and record["node"] == deleted:
+                new_edges = simulator.last_new_edges if batched else simulator.DASH_healingstep() #rounds heal as they delete
+                if verify and [list(edge) for edge in new_edges] != record["new_edges"]:
+                    raise ValueError(f"Replay diverged from the event log at step {simulator.step}: healing added {new_edges}, the log has {record['new_edges']}")
+                simulator.record_progress(record) #run statistics straight from the log, no stats() call needed
+                deleted = None
+                applied = simulator.step - first_step
+        if strategy in ATTACKS and applied:
+            simulator.targets.pop(strategy, None) #candidates are stale, the next pick starts with a full pass
+    finally:
+        simulator.observers = observers
+    logger.info("Replayed %s steps, now at step %s", applied, simulator.step)
+    return applied
+
+#command line entry point: restore a checkpoint, replay an event log up to a step and save that state
+def main(argv=None):
+    from simulator import Simulator #checkpoint is imported by simulator, so only import it back when run as a script
+
+    parser = argparse.ArgumentParser(description="Jump a saved NetGraph run to a later step by replaying its event log.")
+    parser.add_argument("checkpoint", help="checkpoint (.npz) to start from, e.g. the one saved at step 0")
+    parser.add_argument("log", help="JSONL event log of the run")
+    parser.add_argument("--until", type=int, default=None, help="last step to replay (default: everything in the log)")
+    parser.add_argument("-o", "--out", required=True, help="checkpoint to write the replayed state to")
+    parser.add_argument("--no-verify", action="store_true", help="don't check healed edges against the log")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    simulator = load_checkpoint(args.checkpoint, Simulator())
+    replay(simulator, read_events(args.log), args.until, verify=not args.no_verify)
+    save_checkpoint(simulator, args.out)
+    print(f"Saved step {simulator.step} ({len(simulator.G)} nodes) to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+from array import array
+from collections import deque
+
+import networkx as nx
+import numpy as np
+
+import generators
+
+#interleaved breadth first search from several source nodes at once. searches that touch each other are merged, and the
+#loop stops as soon as only one search is still running. every search that runs out of frontier before that point has
+#explored a whole component on its own, so the work done is bounded by the size of the smaller pieces (plus the distance
+#the searches need to meet) instead of the size of the whole graph.
+#returns the node sets of the pieces that were closed off. the remaining (unexplored) piece is not returned.
+#neighbors can replace graph.neighbors, e.g. to search the graph as if a node or an edge were missing. with first, the
+#search stops at the first closed piece. with limit, it gives up (returns None) after expanding that many nodes
+def local_components(graph, sources, neighbors=None, first=False, limit=None):
+    neighbors = neighbors or graph.neighbors
+    parent = {} #union-find over search ids
+    def find(gid):
+        while parent[gid] != gid:
+            parent[gid] = parent[parent[gid]]
+            gid = parent[gid]
+        return gid
+
+    owner = {} #node -> search id that reached it first
+    searches = {} #root search id -> (queue, visited)
+    for gid, source in enumerate(dict.fromkeys(sources)):
+        if source in owner: #duplicate source
+            continue
+        parent[gid] = gid
+        owner[source] = gid
+        searches[gid] = (deque([source]), {source})
+
+    closed = []
+    expanded = 0
+    while len(searches) > 1:
+        for gid in list(searches):
+            if gid not in searches: #merged into another search earlier in this round
+                continue
+            queue, visited = searches[gid]
+            if not queue: #nothing left to explore, this search covers a full component
+                closed.append(visited)
+                del searches[gid]
+                if len(searches) <= 1 or first:
+                    return closed
+                continue
+
+            expanded += 1
+            if limit is not None and expanded > limit:
+                return None
+            node = queue.popleft()
+            for neighbour in neighbors(node):
+                other = owner.get(neighbour)
+                if other is None:
+                    owner[neighbour] = gid
+                    visited.add(neighbour)
+                    queue.append(neighbour)
+                    continue
+                other = find(other)
+                if other == gid:
+                    continue
+                #two searches met, so their sources are connected. fold the smaller search into the larger one
+                other_queue, other_visited = searches.pop(other)
+                del searches[gid]
+                if len(other_visited) > len(visited):
+                    other_queue, queue = queue, other_queue
+                    other_visited, visited = visited, other_visited
+                    parent[gid] = other
+                    gid = other
+                else:
+                    parent[other] = gid
+                visited.update(other_visited)
+                queue.extend(other_queue)
+                searches[gid] = (queue, visited)
+                if len(searches) <= 1:
+                    break
+            if len(searches) <= 1:
+                break
+
+    return closed
+
+#keeps track of the connected components of a graph while nodes and edges are removed/added, so the simulation does not
+#need a full nx.is_connected traversal after every step.
+#each node carries a component label. labels may over-approximate connectivity (a label can cover several real
+#components right after a deletion), so deletions only queue the deleted node's former neighbours, and the next query
+#runs a local search around them to split the label if needed. edge insertions merge labels smaller-into-larger.
+class ConnectivityTracker:
+    def __init__(self, graph):
+        self.graph = graph
+        self.label = {} #node -> component label
+        self.members = {} #component label -> set of nodes
+        self.pending = {} #component label -> former neighbours of deleted nodes that may no longer be connected
+        self.next_label = 0
+
+        self.first_disconnect_step = None #step at which the graph first became disconnected
+        self.first_disconnect_nodes = None #number of nodes that were remaining at that point
+
+        for component in nx.connected_components(graph):
+            self.new_component(component)
+
+    def new_component(self, nodes):
+        label = self.next_label
+        self.next_label += 1
+        self.members[label] = set(nodes)
+        for node in nodes:
+            self.label[node] = label
+        return label
+
+    def add_node(self, node):
+        self.new_component([node])
+
+    def remove_node(self, node, neighbours):
+        #neighbours are the neighbours the node had before it was removed
+        label = self.label.pop(node)
+        members = self.members[label]
+        members.discard(node)
+        if not members:
+            del self.members[label]
+            self.pending.pop(label, None)
+            return
+
+        #a node with a single neighbour can't disconnect anything, unless it was itself standing in for an earlier
+        #deletion that still has to be checked
+        pending = self.pending.get(label)
+        if len(neighbours) > 1 or (pending and node in pending):
+            self.pending.setdefault(label, set()).update(neighbours)
+
+    def add_edge(self, u, v):
+        a = self.label[u]
+        b = self.label[v]
+        if a == b:
+            return
+
+        if len(self.members[a]) < len(self.members[b]):
+            a, b = b, a
+        merged = self.members.pop(b)
+        for node in merged:
+            self.label[node] = a
+        self.members[a].update(merged)
+        if b in self.pending:
+            self.pending.setdefault(a, set()).update(self.pending.pop(b))
+
+    def resolve(self):
+        pending = self.pending
+        self.pending = {}
+        for label, sources in pending.items():
+            sources = [node for node in sources if self.label.get(node) == label]
+            if len(sources) < 2:
+                continue
+
+            for piece in local_components(self.graph, sources):
+                self.members[label].difference_update(piece)
+                self.new_component(piece)
+
+    def number_of_components(self):
+        self.resolve()
+        return len(self.members)
+
+    def is_connected(self):
+        return self.number_of_components() == 1
+
+    def mark_step(self, step):
+        #called once per simulation step, records when the graph first falls apart
+        components = self.number_of_components()
+        if components > 1 and self.first_disconnect_step is None:
+            self.first_disconnect_step = step
+            self.first_disconnect_nodes = len(self.label)
+        return components
+
+#ConnectivityTracker for an ArrayGraph, same interface and results. instead of dicts and a member set per component, the
+#labels are one int32 array indexed by node (-1 once deleted) and components are a union-find over labels with a node
+#count per root label: add_edge links two roots instead of relabelling the smaller component, and resolve gives every
+#piece that split off a fresh label. a component is every node whose label leads to the same root
+class ArrayConnectivityTracker:
+    def __init__(self, graph):
+        self.graph = graph
+        self.pending = {} #root label -> former neighbours of deleted nodes that may no longer be connected
+
+        self.first_disconnect_step = None #step at which the graph first became disconnected
+        self.first_disconnect_nodes = None #number of nodes that were remaining at that point
+
+        natural, healing = graph.edge_arrays()
+        roots = generators.component_roots(graph.n, np.concatenate((natural, healing)))
+        nodes = graph.node_array()
+        self.label = np.full(graph.n, -1, dtype=np.int32)
+        roots, labels = np.unique(roots[nodes], return_inverse=True)
+        self.label[nodes] = labels
+        self.parent = array('q', range(len(roots))) #label -> parent label, roots point at themselves
+        self.size = array('q', np.bincount(labels, minlength=len(roots)).tobytes()) #nodes per root label
+        self.components = len(roots)
+
+    def find(self, label):
+        parent = self.parent
+        while parent[label] != label:
+            parent[label] = parent[parent[label]]
+            label = parent[label]
+        return label
+
+    def new_component(self, count):
+        label = len(self.parent)
+        self.parent.append(label)
+        self.size.append(count)
+        self.components += 1
+        return label
+
+    def add_node(self, node):
+        self.label[node] = self.new_component(1)
+
+    def remove_node(self, node, neighbours):
+        #neighbours are the neighbours the node had before it was removed
+        root = self.find(int(self.label[node]))
+        self.label[node] = -1
+        self.size[root] -= 1
+        if not self.size[root]:
+            self.components -= 1
+            self.pending.pop(root, None)
+            return
+
+        pending = self.pending.get(root)
+        if len(neighbours) > 1 or (pending and node in pending):
+            self.pending.setdefault(root, set()).update(neighbours)
+
+    def add_edge(self, u, v):
+        a = self.find(int(self.label[u]))
+        b = self.find(int(self.label[v]))
+        if a == b:
+            return
+
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        self.components -= 1
+        if b in self.pending:
+            self.pending.setdefault(a, set()).update(self.pending.pop(b))
+
+    def resolve(self):
+        pending = self.pending
+        self.pending = {}
+        label = self.label
+        for root, sources in pending.items():
+            sources = [node for node in sources if label[node] != -1 and self.find(int(label[node])) == root]
+            if len(sources) < 2:
+                continue
+
+            for piece in local_components(self.graph, sources):
+                self.size[root] -= len(piece)
+                label[list(piece)] = self.new_component(len(piece))
+
+    def number_of_components(self):
+        self.resolve()
+        return self.components
+
+    def is_connected(self):
+        return self.number_of_components() == 1
+
+    def mark_step(self, step):
+        components = self.number_of_components()
+        if components > 1 and self.first_disconnect_step is None:
+            self.first_disconnect_step = step
+            self.first_disconnect_nodes = len(self.graph)
+        return components
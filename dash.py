@@ -1,120 +1,113 @@
+import logging
+
 import networkx
-import netgraph
+
+logger = logging.getLogger(__name__)
 
 def return_node_delta(graph, id):
         return graph.nodes[id]['delta']
 
-class btreeNode: #class for nodes in the btree
-    def __init__(self, graph, id):
-        self.id = id
-        self.delta = return_node_delta(graph, id) #delta value of the node
-        self.leftchild = None
-        self.rightchild = None
-
+#positions of a complete binary tree with k nodes (heap numbering: children of i are 2i+1 and 2i+2), listed in in-order.
+#computed iteratively so large neighbourhoods can't hit the recursion limit
+def inorder_positions(k):
+    positions = []
+    stack = []
+    i = 0
+    while stack or i < k:
+        while i < k:
+            stack.append(i)
+            i = 2 * i + 1
+        i = stack.pop()
+        positions.append(i)
+        i = 2 * i + 2
+    return positions
+
+#reconstruction tree for DASH. neighbours are sorted by delta once (ties broken by node id) and laid out in a complete
+#binary tree so that an in-order walk still gives ascending delta, like the old insertion-built BST, but the tree is
+#always balanced no matter how many neighbours share the same delta. building it is O(k log k).
+#the healing edges are not the ones the old BST made, even when every delta is distinct: the old tree's shape
+#depended on the order the neighbours were inserted in, this one only on their number. e.g. nodes 0-6 with deltas
+#5, 1, 4, 2, 3, 0, 6 used to be healed with (0,1) (0,6) (1,2) (1,5) (2,3) (3,4), now with (4,1) (4,0) (1,5) (1,3)
+#(0,2) (0,6): the middle delta at the root and depth log2(k) instead of up to k
 class btree:
-    def __init__(self, graph):
-        self.root = None
+    def __init__(self, graph, ids=()):
         self.graph = graph
-
-    def insert(self, val):
-        if self.root is None:
-            self.root = btreeNode(self.graph, val) #convert graph's node to an abstract btreeNode
-            print(f"Inserted {val} as root node with delta {self.root.delta}.")
-        else:
-            self.recursive_insert(self.root, val)
-
-    def recursive_insert(self, current_node, val):
-        if return_node_delta(self.graph, val) <= current_node.delta:
-            if current_node.leftchild is None:
-                current_node.leftchild = btreeNode(self.graph, val)
-                print(f"Inserted {val} as left child of {current_node.id} as child delta {return_node_delta(self.graph, val)} is less than or equal to parent delta {current_node.delta}")
-            else:
-                self.recursive_insert(current_node.leftchild, val)
-        else: #if val greater than value of current node
-            if current_node.rightchild is None:
-                current_node.rightchild = btreeNode(self.graph, val)
-                print(f"Inserted {val} as right child of {current_node.id} as child delta {return_node_delta(self.graph, val)} is greater than parent delta {current_node.delta}")
-            else:
-                self.recursive_insert(current_node.rightchild, val)
+        self.order = sorted(set(ids), key=lambda id: (return_node_delta(graph, id), id)) #ascending delta
+        self.slots = [None] * len(self.order) #node id stored at each heap position
+        for node_id, position in zip(self.order, inorder_positions(len(self.order))):
+            self.slots[position] = node_id
 
     def inorder_traversal(self):
-        result = []
-        self.recursive_inorder_traversal(self.root, result)
-        return result
-    
-    def recursive_inorder_traversal(self, node, result):
-        if node is not None:
-            self.recursive_inorder_traversal(node.leftchild, result)
-            result.append(node.id)
-            self.recursive_inorder_traversal(node.rightchild, result)
+        return list(self.order)
+
+    def edges(self):
+        #parent/child pairs of the tree, read straight off the heap numbering
+        slots = self.slots
+        return [(slots[(child - 1) // 2], slots[child]) for child in range(1, len(slots))]
 
     def find_direct_connections(self):
         connections = {}
-        self.recursive_find_connections(self.root, connections)
+        for parent, child in self.edges():
+            connections.setdefault(parent, []).append(child)
         return connections
-    
-    def recursive_find_connections(self, node, connections):
-        if node is not None:
-            if node.leftchild is not None:
-                connections[node.id] = connections.get(node.id, []) + [node.leftchild.id]
-            if node.rightchild is not None:
-                connections[node.id] = connections.get(node.id, []) + [node.rightchild.id]
-            self.recursive_find_connections(node.leftchild, connections)
-            self.recursive_find_connections(node.rightchild, connections)
-
-def dash(graph, deletednode, deletednodeneighbours):
+
+def dash(graph, deletednode, deletednodeneighbours, timer=None):
     #note: deletednodeneighbours is only a list of ints!!! delta values have to be acquired from the graph
-    print(f"Most recently deleted node: {deletednode}, Neighbours of deleted node: {deletednodeneighbours}") #debug
+    #timer is an optional phasetimer.PhaseTimer, tree building and edge insertion are timed separately
+    debug = logger.isEnabledFor(logging.DEBUG) #checked once so disabled logging costs nothing in the loops below
+    if debug:
+        logger.debug("Most recently deleted node: %s, Neighbours of deleted node: %s", deletednode, deletednodeneighbours)
 
     if len(deletednodeneighbours) == 1:
-        print("Only one neighbour, no need to heal.")
+        logger.debug("Only one neighbour, no need to heal.")
         return graph, []
 
 
-    binarytree = btree(graph)
-
-    #prestep. remove duplicate nodes from deletednodeneighbours
-    deletednodeneighbours = list(set(deletednodeneighbours))
-
-
-    #1. inserted neighbours of deleted node by ascending order of delta value
-    for node_id in deletednodeneighbours:
-        delta_value = graph.nodes[node_id]['delta']
-        print(f"Node ID: {node_id}, Delta Value: {delta_value}")
-        binarytree.insert(node_id)
+    #1. build reconstruction tree from the neighbours of deleted node (duplicates are dropped, order is ascending delta value)
+    start = timer.start() if timer else None
+    binarytree = btree(graph, deletednodeneighbours)
+    tree_edges = binarytree.edges()
+    if timer:
+        start = timer.stop("dash_tree", start)
+    if debug:
+        logger.debug("Neighbours by ascending delta: %s", [(node_id, graph.nodes[node_id]['delta']) for node_id in binarytree.order])
 
     #2. add edges between nodes of graph based on how they are connected in binary tree
     new_edges = [] #list of new edges created via healing
     edges_added = False #track whether edges were created to avoid unneccessary propagation of DashID if all edges already exist
     altered_nodes = [] #nodes with new edges
-    connections = binarytree.find_direct_connections()
-
-    print(f"Direct connections: {connections}")
-
-    for parent, children in connections.items():
-        for child in children:
-            if not graph.has_edge(parent, child):
-                graph.add_edge(parent, child)
-                new_edges.append((parent, child))  # Add new edge to list
-                print(f"Added edge between {parent} and {child}")
-                edges_added = True
-                altered_nodes.append(parent)
-                altered_nodes.append(child)
-            else:
-                print(f"Edge between {parent} and {child} already exists.")
+
+    if debug:
+        logger.debug("Tree edges: %s", tree_edges)
+
+    for parent, child in tree_edges:
+        if not graph.has_edge(parent, child):
+            graph.add_edge(parent, child, healing=True) #mark as healing edge so neighbours can be told apart in O(degree)
+            new_edges.append((parent, child))  # Add new edge to list
+            if debug:
+                logger.debug("Added edge between %s and %s", parent, child)
+            edges_added = True
+            altered_nodes.append(parent)
+            altered_nodes.append(child)
+        elif debug:
+            logger.debug("Edge between %s and %s already exists.", parent, child)
 
     #3. propagate minimum DashID of neighbour nodes to all nodes processed in this operation
     #find minimum DashID of deletednodeneighbours
     if edges_added:
-        min_dashID = min([graph.nodes[id]['dashID'] for id in deletednodeneighbours])
-        print(f"Minimum DashID of deleted node's neighbours: {min_dashID}")
+        min_dashID = min([graph.nodes[id]['dashID'] for id in binarytree.order])
+        if debug:
+            logger.debug("Minimum DashID of deleted node's neighbours: %s", min_dashID)
 
         #propagate minimum DashID to all nodes processed in this operation
         for id in altered_nodes:
             graph.nodes[id]['dashID'] = min_dashID
 
-            print(f"Propagated DashID {min_dashID} to node {id}")
+            if debug:
+                logger.debug("Propagated DashID %s to node %s", min_dashID, id)
     else:
-        print(f"No edges were added, DashID not propagated.")   
+        logger.debug("No edges were added, DashID not propagated.")
 
+    if timer:
+        timer.stop("edge_insertion", start)
     return graph, new_edges
\ No newline at end of file
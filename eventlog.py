@@ -0,0 +1,92 @@
+import json
+
+#buffered, machine readable log of a simulation run. one JSON object per line (JSONL), one record per deletion (or batched
+#deletion round) and per healing step, so runs can be analysed with any JSON tooling instead of scraping prose.
+#can be attached to a Simulator as an observer:
+#   log = EventLog("run.jsonl"); simulator.add_observer(log)
+#heal records carry the stats of their step and are written when Simulator.run reports the step ("step" event)
+class EventLog:
+    def __init__(self, path, buffer_size=1000, append=False):
+        self.path = path
+        self.buffer_size = buffer_size #records kept in memory before they are written out
+        self.buffer = []
+        self.heal = None #heal record waiting for the stats of its step
+        self.file = open(path, "a" if append else "w", encoding='utf-8') #unless appending, an existing log is overwritten
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, record):
+        self.buffer.append(json.dumps(record, separators=(',', ':'), default=to_json))
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer))
+            self.file.write("\n")
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __call__(self, simulator, event): #observer hook
+        if event == "delete":
+            #the simulator's neighbour list is the partition representatives with the healing neighbours appended, the
+            #record keeps them apart so no node is listed twice
+            healing = simulator.last_deleted_node_healing_neighbours
+            neighbours = simulator.last_deleted_node_neighbours_list
+            record = {
+                "event": "delete",
+                "step": simulator.step,
+                "node": simulator.last_deleted_node,
+                "neighbours": neighbours[:len(neighbours) - len(healing)],
+                "healing_neighbours": healing,
+            }
+            if simulator.fell_back: #the strategy had no target, the victim is a random node
+                record["fallback"] = True
+            self.write(record)
+        elif event == "round":
+            record = {
+                "event": "round",
+                "step": simulator.step,
+                "nodes": simulator.last_deleted_nodes,
+                "holes": [hole for hole, _ in simulator.last_round],
+                "neighbours": [neighbours for _, neighbours in simulator.last_round],
+            }
+            if simulator.fell_back:
+                record["fallback"] = True
+            self.write(record)
+        elif event == "heal":
+            self.heal = {
+                "event": "heal",
+                "step": simulator.step,
+                "node": simulator.last_deleted_node,
+                "new_edges": simulator.last_new_edges,
+            }
+        elif event == "step" and self.heal is not None:
+            #the heal record is finished with the stats Simulator.run computed for the step, not a second stats() call
+            stats = simulator.last_stats
+            self.heal.update(nodes=stats["nodes"], max_delta=stats["max_delta"], max_degree=stats["max_degree"], components=stats["components"])
+            self.write(self.heal)
+            self.heal = None
+
+def to_json(value):
+    #numpy scalars and other non-JSON types that show up in node ids/attributes
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def read_events(path):
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
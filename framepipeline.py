@@ -0,0 +1,142 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+
+import matplotlib.image
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from renderer import GraphRenderer, fit_limits, snapshot
+
+#background frame rendering for autoplay runs. the simulation only takes a lightweight snapshot (arrays of positions,
+#attributes and edge indices) and hands it to a pool of worker processes, which rasterize the frame with their own
+#headless GraphRenderer. a writer thread collects the finished frames in order and streams them straight into a
+#GIF/MP4 encoder and/or writes them out as PNGs. at most max_pending frames are in flight (submitted but not written
+#yet), so a simulation that outruns the workers can't pile up frames in memory. a step that finds no room is not
+#recorded (counted in dropped) and the simulation carries on, with block=True it waits for the oldest frame to be
+#written instead, so every stride-th step ends up in the video.
+
+logger = logging.getLogger(__name__)
+
+worker_renderer = None #one renderer per worker process, reused for every frame it draws
+
+def init_worker(figsize, dpi, limits):
+    global worker_renderer
+    worker_renderer = GraphRenderer(figsize=figsize, dpi=dpi, blit=False)
+    worker_renderer.attach(FigureCanvasAgg(worker_renderer.fig))
+    worker_renderer.set_limits(limits)
+
+def render_frame(state, frame_path=None, return_frame=True):
+    worker_renderer.draw(state)
+    frame = worker_renderer.rasterize()
+    if frame_path is not None:
+        matplotlib.image.imsave(frame_path, frame)
+    return frame if return_frame else None
+
+def open_video_writer(path, fps):
+    import imageio.v2 as imageio #only needed when encoding video
+    if path.lower().endswith(".gif"):
+        return imageio.get_writer(path, mode='I', duration=1000 / fps, loop=0)
+    return imageio.get_writer(path, fps=fps) #mp4 and friends go through ffmpeg (pip install imageio-ffmpeg)
+
+#observer that records every stride-th simulation step:
+#   with FrameRecorder(simulator, video_path="run.gif", stride=10) as recorder:
+#       simulator.add_observer(recorder)
+#       simulator.run()
+class FrameRecorder:
+    def __init__(self, simulator, video_path=None, frames_dir=None, stride=1, figsize=(10, 8), dpi=100, fps=2, workers=None, timer=None, max_pending=None, block=False):
+        if video_path is None and frames_dir is None:
+            raise ValueError("FrameRecorder needs a video_path and/or a frames_dir.")
+
+        self.stride = max(1, int(stride))
+        self.last_step = simulator.step
+        self.frames_dir = frames_dir
+        self.frames = 0
+        self.dropped = 0 #steps that weren't recorded because max_pending frames were in flight
+        self.block = block
+        self.error = None
+        self.discard = False #set by close(discard=True), unwritten frames are dropped
+        self.timer = timer #optional phasetimer.PhaseTimer, the time spent handing frames over (and with block, waiting for room) counts as savefig
+        if frames_dir is not None:
+            os.makedirs(frames_dir, exist_ok=True)
+
+        self.writer = open_video_writer(video_path, fps) if video_path else None
+
+        #spawned (not forked) workers, so a Tk session in the parent is never copied into them
+        workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        limits = fit_limits(list(simulator.pos.values()))
+        self.pool = multiprocessing.get_context("spawn").Pool(workers, initializer=init_worker, initargs=(figsize, dpi, limits))
+
+        self.results = queue.Queue() #pending frames in submission order
+        self.slots = threading.BoundedSemaphore(max_pending or 2 * workers) #one per frame in flight, freed once written
+        self.thread = threading.Thread(target=self.write_frames, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, simulator, event): #observer hook
+        if event == "generate":
+            self.last_step = simulator.step
+        elif event == "step":
+            if simulator.step // self.stride > self.last_step // self.stride: #every stride-th step, also when rounds skip it
+                self.record(simulator)
+            self.last_step = simulator.step
+
+    def record(self, simulator):
+        start = self.timer.start() if self.timer else None
+        if not self.slots.acquire(blocking=self.block):
+            self.dropped += 1
+            if self.timer:
+                self.timer.stop("savefig", start)
+            return
+        state = snapshot(simulator)
+        frame_path = None
+        if self.frames_dir is not None:
+            frame_path = os.path.join(self.frames_dir, f"{len(state['nodes'])}.png") #named after the remaining node count
+        self.results.put(self.pool.apply_async(render_frame, (state, frame_path, self.writer is not None)))
+        self.frames += 1
+        if self.timer:
+            self.timer.stop("savefig", start)
+
+    def write_frames(self):
+        while True:
+            result = self.results.get()
+            if result is None:
+                return
+            while not self.discard and not result.ready():
+                result.wait(0.1)
+            try:
+                if not self.discard:
+                    frame = result.get()
+                    if self.writer is not None:
+                        self.writer.append_data(frame)
+            except Exception as e: #keep draining so close() doesn't hang, report the first failure there
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.slots.release()
+
+    def close(self, discard=False):
+        #waits for every recorded frame to be written, or with discard drops the ones that aren't written yet
+        if self.pool is None:
+            return
+        self.discard = discard
+        self.results.put(None)
+        self.thread.join()
+        if discard:
+            self.pool.terminate()
+        else:
+            self.pool.close()
+        self.pool.join()
+        self.pool = None
+        if self.writer is not None:
+            self.writer.close()
+        if self.dropped:
+            logger.info("Rendering fell behind, %s of %s recorded steps were dropped", self.dropped, self.frames + self.dropped)
+        if self.error is not None:
+            raise self.error
@@ -0,0 +1,210 @@
+import networkx as nx
+import numpy as np
+
+#bulk graph generators for large starting graphs. everything is built as numpy arrays (an (m, 2) edge array, optional
+#(n, 2) coordinates and per-node attribute arrays) so a million node graph takes seconds, and only converted to a
+#networkx graph at the end. all generators take a numpy Generator, so runs are reproducible from a seed.
+
+MODELS = ("geometric", "erdos_renyi", "barabasi_albert", "small_world")
+
+#drop self loops and duplicate edges, store every edge as (low, high)
+def canonical_edges(edges):
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    low = np.minimum(edges[:, 0], edges[:, 1])
+    high = np.maximum(edges[:, 0], edges[:, 1])
+    keep = low != high
+    low, high = low[keep], high[keep]
+    if len(low) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    #one int64 key per edge is much faster to deduplicate than unique rows
+    width = int(high.max()) + 1
+    keys = np.sort(low * width + high)
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return np.column_stack((keys // width, keys % width))
+
+#all pairs of points closer than radius, each unordered pair once. points are binned into a grid of cells at least
+#radius wide, so only pairs in the same or adjacent cells are ever compared
+def close_pairs(pos, radius):
+    n = len(pos)
+    if n < 2:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    low = pos.min(axis=0)
+    span = max(float((pos.max(axis=0) - low).max()), radius)
+    cells_per_side = max(1, min(int(span / radius), 2**30)) #cell ids have to fit in int64
+    cell_xy = np.minimum(((pos - low) / span * cells_per_side).astype(np.int64), cells_per_side - 1)
+    cell = cell_xy[:, 0] * cells_per_side + cell_xy[:, 1]
+
+    order = np.argsort(cell, kind='stable')
+    sorted_cells = cell[order]
+    if cells_per_side ** 2 <= 4 * n: #dense table of every cell's range is cheapest
+        table = np.searchsorted(sorted_cells, np.arange(cells_per_side ** 2 + 1), side='left')
+
+    found_u = []
+    found_v = []
+    #half of the 3x3 neighbourhood (plus the cell itself) so every pair of cells is visited once
+    for dx, dy in ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1)):
+        nx_ = cell_xy[:, 0] + dx
+        ny_ = cell_xy[:, 1] + dy
+        valid = (nx_ >= 0) & (nx_ < cells_per_side) & (ny_ >= 0) & (ny_ < cells_per_side)
+        sources = np.nonzero(valid)[0]
+        other = nx_[valid] * cells_per_side + ny_[valid]
+        if cells_per_side ** 2 <= 4 * n:
+            starts = table[other]
+            counts = table[other + 1] - starts
+        else: #sparse, look up only the cells that are needed
+            starts = np.searchsorted(sorted_cells, other, side='left')
+            counts = np.searchsorted(sorted_cells, other, side='right') - starts
+
+        #expand every source into one candidate pair per point in the neighbouring cell
+        u = np.repeat(sources, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        v = order[np.repeat(starts, counts) + offsets]
+        if dx == 0 and dy == 0:
+            keep = u < v #same cell, keep each pair once
+            u, v = u[keep], v[keep]
+
+        close = np.sum((pos[u] - pos[v]) ** 2, axis=1) <= radius * radius
+        found_u.append(u[close])
+        found_v.append(v[close])
+
+    return np.concatenate(found_u), np.concatenate(found_v)
+
+#random geometric graph in the unit square: nodes closer than radius are connected
+def geometric_edges(n, radius, rng):
+    pos = rng.random((n, 2))
+    u, v = close_pairs(pos, radius)
+    return canonical_edges(np.column_stack((u, v))), pos
+
+#G(n, p) with p = average_degree / (n - 1), by sampling the edge count and then that many random pairs
+def erdos_renyi_edges(n, average_degree, rng):
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = n * (n - 1) // 2
+    target = rng.binomial(pairs, min(1.0, average_degree / (n - 1)))
+    edges = np.empty((0, 2), dtype=np.int64)
+    while len(edges) < target:
+        missing = target - len(edges)
+        sample = rng.integers(0, n, size=(int(missing * 1.1) + 16, 2))
+        edges = canonical_edges(np.concatenate((edges, sample)))
+    return edges[rng.permutation(len(edges))[:target]]
+
+#preferential attachment, every new node brings m edges. uses the edge-list copying formulation (Batagelj & Brandes):
+#picking a uniformly random slot of the endpoint list is the same as picking a node proportionally to its degree, and
+#a slot either names an edge's source directly or copies an earlier edge's target, which is resolved for all edges at
+#once by pointer jumping instead of a per-node python loop
+def barabasi_albert_edges(n, m, rng):
+    m = max(1, min(m, n - 1))
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64)
+
+    #seed: node m joined to nodes 0..m-1, then nodes m+1..n-1 attach m edges each
+    seed_sources = np.full(m, m, dtype=np.int64)
+    seed_targets = np.arange(m, dtype=np.int64)
+    new_nodes = np.arange(m + 1, n, dtype=np.int64)
+    sources = np.concatenate((seed_sources, np.repeat(new_nodes, m)))
+    edge_count = len(sources)
+
+    #slot 2e holds sources[e], slot 2e+1 holds the target of edge e. edge e may only copy slots of earlier nodes' edges
+    first_edge = np.concatenate((np.zeros(m, dtype=np.int64), m + (np.arange(len(new_nodes), dtype=np.int64).repeat(m) * m)))
+    slot = np.full(edge_count, -1, dtype=np.int64)
+    slot[m:] = (rng.random(edge_count - m) * (2 * first_edge[m:])).astype(np.int64)
+
+    targets = np.full(edge_count, -1, dtype=np.int64)
+    targets[:m] = seed_targets
+    pointer = slot.copy() #for unresolved edges, the slot they copy from
+    while True:
+        pending = targets < 0
+        if not pending.any():
+            break
+        p = pointer[pending]
+        even = p % 2 == 0
+        resolved = np.where(even, sources[p // 2], targets[p // 2])
+        done = resolved >= 0
+        idx = np.nonzero(pending)[0]
+        targets[idx[done]] = resolved[done]
+        #odd slot whose edge isn't resolved yet: follow that edge's own slot
+        follow = ~done
+        pointer[idx[follow]] = pointer[p[follow] // 2]
+
+    return canonical_edges(np.column_stack((sources, targets)))
+
+#Watts-Strogatz: ring lattice where every node links to its k nearest neighbours, then each edge is rewired to a random
+#endpoint with probability p
+def small_world_edges(n, k, p, rng):
+    half = max(1, k // 2)
+    nodes = np.arange(n, dtype=np.int64)
+    u = np.repeat(nodes, half)
+    v = (u + np.tile(np.arange(1, half + 1, dtype=np.int64), n)) % n
+    rewire = rng.random(len(u)) < p
+    v[rewire] = rng.integers(0, n, size=int(rewire.sum()))
+    return canonical_edges(np.column_stack((u, v)))
+
+#component root of every node, by hooking roots onto smaller roots and compressing paths until no edge crosses two
+#components (union-find done with whole-array operations)
+def component_roots(n, edges):
+    parent = np.arange(n, dtype=np.int64)
+    u = edges[:, 0]
+    v = edges[:, 1]
+    while True:
+        ru = parent[u]
+        rv = parent[v]
+        crossing = ru != rv
+        if not crossing.any():
+            return parent
+        np.minimum.at(parent, np.maximum(ru, rv)[crossing], np.minimum(ru, rv)[crossing])
+        while True:
+            compressed = parent[parent]
+            if np.array_equal(compressed, parent):
+                break
+            parent = compressed
+
+#link every component to the next one through their root nodes, in one pass over the union-find result
+def connect_components(n, edges):
+    roots = np.flatnonzero(component_roots(n, edges) == np.arange(n))
+    if len(roots) <= 1:
+        return edges
+    links = np.column_stack((roots[:-1], roots[1:])) #roots of different components, can't duplicate an existing edge
+    return np.concatenate((edges, links))
+
+#delta starts at 0, dashID/initial_dashID are the same random float in [0, 1)
+def initial_attributes(n, rng):
+    dash_ids = rng.random(n)
+    return {
+        "delta": np.zeros(n, dtype=np.int64),
+        "dashID": dash_ids,
+        "initial_dashID": dash_ids.copy(),
+    }
+
+def generate(model, n, rng, radius=None, average_degree=6, m=3, k=6, p=0.1, connect=True):
+    pos = None
+    if model == "geometric":
+        radius = radius if radius is not None else 1.0 / (n ** 0.5) #make radius smaller if more nodes
+        edges, pos = geometric_edges(n, radius, rng)
+    elif model == "erdos_renyi":
+        edges = erdos_renyi_edges(n, average_degree, rng)
+    elif model == "barabasi_albert":
+        edges = barabasi_albert_edges(n, m, rng)
+    elif model == "small_world":
+        edges = small_world_edges(n, k, p, rng)
+    else:
+        raise ValueError(f"Unknown graph model: {model}")
+
+    if connect:
+        edges = connect_components(n, edges)
+
+    graph = {"n": n, "edges": edges, "pos": pos}
+    graph.update(initial_attributes(n, rng))
+    return graph
+
+def to_networkx(graph):
+    G = nx.Graph()
+    delta = graph["delta"].tolist()
+    dash_ids = graph["dashID"].tolist()
+    initial = graph["initial_dashID"].tolist()
+    if graph["pos"] is not None:
+        pos = [tuple(xy) for xy in graph["pos"].tolist()]
+        G.add_nodes_from((node, {'delta': delta[node], 'dashID': dash_ids[node], 'initial_dashID': initial[node], 'pos': pos[node]}) for node in range(graph["n"]))
+    else:
+        G.add_nodes_from((node, {'delta': delta[node], 'dashID': dash_ids[node], 'initial_dashID': initial[node]}) for node in range(graph["n"]))
+    G.add_edges_from(graph["edges"].tolist())
+    return G
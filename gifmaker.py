@@ -1,6 +1,19 @@
+import argparse
 import os
-import imageio.v2 as imageio
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import GifImagePlugin, Image, ImageChops
+
+#turns the PNG snapshots in auto_output into an animated gif without ever holding more than a small window of frames in
+#memory. frames are decoded, downscaled and mapped onto one shared palette by a pool of worker processes, collected back
+#in order, and appended to the gif as they arrive. identical consecutive frames are merged into one longer frame.
+#a frame whose colours the shared palette can't match (more than MISMATCH_SHARE of its pixels off by more than
+#MISMATCH_TOLERANCE in some channel) is quantized on its own and written with a local palette instead.
+
+MISMATCH_TOLERANCE = 48
+MISMATCH_SHARE = 0.001
 
 directory = 'auto_output'
 
@@ -8,12 +21,139 @@ def numerical_sort(value):
     parts = re.split(r'(\d+)', value)
     return [int(part) if part.isdigit() else part for part in parts]
 
-filenames = sorted([os.path.join(directory, file) for file in os.listdir(directory) if file.endswith('.png')], key=numerical_sort, reverse=True)
+def list_frames(directory, every=1, reverse=True):
+    #snapshots are named after the remaining node count, so descending order is chronological
+    filenames = sorted([os.path.join(directory, file) for file in os.listdir(directory) if file.endswith('.png')], key=numerical_sort, reverse=reverse)
+    return filenames[::max(1, every)]
+
+def load_frame(filename, scale=1.0):
+    with Image.open(filename) as image:
+        image = image.convert('RGB')
+    if scale != 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.Resampling.LANCZOS)
+    return image
+
+def build_palette(filenames, scale=1.0, sample=16, colours=256, width=512):
+    #one palette for the whole animation, from frames spread evenly across the run, so frames are only remapped (cheap)
+    #instead of each being quantized from scratch, and colours don't flicker between frames. the samples are shrunk to
+    #at most width pixels with nearest neighbour resampling, which keeps their colours but not their size
+    count = min(sample, len(filenames))
+    picks = [filenames[round(i * (len(filenames) - 1) / max(1, count - 1))] for i in range(count)]
+    frames = []
+    for filename in picks:
+        frame = load_frame(filename, scale)
+        if frame.width > width:
+            frame = frame.resize((width, max(1, round(frame.height * width / frame.width))), Image.Resampling.NEAREST)
+        frames.append(frame)
+    montage = Image.new('RGB', (max(frame.width for frame in frames), sum(frame.height for frame in frames)))
+    top = 0
+    for frame in frames:
+        montage.paste(frame, (0, top))
+        top += frame.height
+    return montage.quantize(colors=colours, method=Image.Quantize.MEDIANCUT)
+
+def mismatch(image, frame):
+    #share of pixels of image (RGB) that frame (P, its quantized version) is off by more than MISMATCH_TOLERANCE
+    red, green, blue = ImageChops.difference(image, frame.convert('RGB')).split()
+    histogram = ImageChops.lighter(red, ImageChops.lighter(green, blue)).histogram()
+    return sum(histogram[MISMATCH_TOLERANCE + 1:]) / (image.width * image.height)
+
+#decode worker state, set once per process
+worker_palette = None
+worker_scale = 1.0
+
+def init_worker(palette, scale):
+    global worker_palette, worker_scale
+    worker_palette = palette
+    worker_scale = scale
+
+def decode_frame(filename):
+    #palette indices only (1 byte per pixel), plus the frame's own palette if the shared one doesn't fit it
+    image = load_frame(filename, worker_scale)
+    frame = image.quantize(palette=worker_palette, dither=Image.Dither.NONE)
+    if mismatch(image, frame) <= MISMATCH_SHARE:
+        return frame.size, frame.tobytes(), None
+    frame = image.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+    return frame.size, frame.tobytes(), bytes(frame.getpalette()[:768])
+
+def decoded_frames(filenames, palette, scale=1.0, workers=None):
+    #parallel decoding with ordered output. at most a couple of frames per worker are in flight at any time
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(palette, scale)) as pool:
+        window = 2 * workers
+        pending = deque()
+        for filename in filenames:
+            pending.append(pool.submit(decode_frame, filename))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+#minimal streaming gif writer: header and global (shared) palette up front, then one image block per appended frame
+class GifStreamWriter:
+    def __init__(self, path, size, palette, loop=0):
+        self.file = open(path, 'wb')
+        self.palette = palette
+        colour_table = bytes(palette.getpalette()[:768]).ljust(768, b'\0')
+        width, height = size
+        self.file.write(b'GIF89a' + width.to_bytes(2, 'little') + height.to_bytes(2, 'little') + bytes([0xF7, 0, 0]) + colour_table)
+        self.file.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + loop.to_bytes(2, 'little') + b'\0') #loop forever when loop=0
+
+    def append(self, size, indices, palette, duration):
+        #indices point into the global palette, or into palette (written as the frame's local colour table) if given
+        frame = Image.frombytes('P', size, indices)
+        if palette is not None:
+            frame.putpalette(palette)
+        for chunk in GifImagePlugin.getdata(frame, duration=duration, include_color_table=palette is not None):
+            self.file.write(chunk)
+
+    def close(self):
+        self.file.write(b';')
+        self.file.close()
+
+def make_gif(directory='auto_output', output='output.gif', fps=2, every=1, scale=1.0, skip_duplicates=True, workers=None, palette_sample=16):
+    filenames = list_frames(directory, every)
+    if not filenames:
+        raise FileNotFoundError(f"No .png frames found in {directory}")
+
+    palette = build_palette(filenames, scale, palette_sample)
+    duration = 1000 / fps #per frame, in milliseconds
+    writer = None
+    held = None #previous frame, written once we know how long it stays on screen
+    written = 0
+    try:
+        for size, indices, local_palette in decoded_frames(filenames, palette, scale, workers):
+            if writer is None:
+                writer = GifStreamWriter(output, size, palette)
+            if held is not None and skip_duplicates and held[:3] == [size, indices, local_palette]:
+                held[3] += duration
+                continue
+            if held is not None:
+                writer.append(*held)
+                written += 1
+            held = [size, indices, local_palette, duration]
+        if held is not None:
+            writer.append(*held)
+            written += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    return written, len(filenames)
 
-print(filenames)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assemble autoplay snapshots into an animated gif.")
+    parser.add_argument("directory", nargs="?", default=directory, help="folder with the .png snapshots")
+    parser.add_argument("-o", "--output", default="output.gif", help="gif file to write")
+    parser.add_argument("--fps", type=float, default=2, help="frames per second")
+    parser.add_argument("--every", type=int, default=1, help="only use every k-th snapshot")
+    parser.add_argument("--scale", type=float, default=1.0, help="downscale factor, e.g. 0.5 for half size")
+    parser.add_argument("--keep-duplicates", action="store_true", help="don't merge identical consecutive frames")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="decoding processes (default: all cores)")
+    parser.add_argument("--palette-sample", type=int, default=16, help="number of frames, spread over the run, the shared palette is built from")
+    args = parser.parse_args(argv)
 
-images = []
-for filename in filenames:
-    images.append(imageio.imread(filename))
+    written, total = make_gif(args.directory, args.output, args.fps, args.every, args.scale, not args.keep_duplicates, args.workers, args.palette_sample)
+    print(f"Wrote {written} frames ({total} snapshots) to {args.output}")
 
-imageio.mimsave('output.gif', images, loop=0, fps=2)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
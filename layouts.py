@@ -0,0 +1,246 @@
+import math
+
+import numpy as np
+
+#node layouts that scale to large graphs. the force layout is Fruchterman-Reingold with grid accelerated repulsion:
+#nodes push on each other through a mesh (one FFT convolution per iteration) and only pairs sharing a mesh cell are
+#handled exactly, so an iteration is about O(n + m) instead of O(n^2). IncrementalLayout keeps a layout tidy during a
+#run by only relaxing the nodes that DASH just gave new edges, everything else stays where it is.
+
+LAYOUTS = ("auto", "generator", "force", "spring")
+
+#repulsion, particle-mesh style: node counts are binned onto a size x size mesh and convolved (via FFT) with the
+#k^2 / d force kernel, so every node feels the nodes of every other cell in O(n + size^2 log size) instead of O(n^2).
+#pairs inside the same cell are too close for the mesh to resolve and are computed exactly.
+#the kernel only depends on the mesh size (distances scale with the cell width), so its spectrum is computed once
+class Mesh:
+    def __init__(self, size):
+        self.size = size
+        self.shape = (3 * size, 3 * size) #room for the full linear convolution
+        offsets = np.arange(-size + 1, size, dtype=float) #in cell widths
+        dx, dy = np.meshgrid(offsets, offsets, indexing='ij')
+        r2 = dx * dx + dy * dy
+        r2[size - 1, size - 1] = np.inf #a cell doesn't push on itself
+        self.kernels = [np.fft.rfft2(dx / r2, self.shape), np.fft.rfft2(dy / r2, self.shape)]
+
+    def repulsion(self, pos, k):
+        n = len(pos)
+        size = self.size
+        #the mesh spans the bulk of the nodes (1st to 99th percentile), nodes further out are binned into the border
+        #cells. spanning every node would let a few outliers stretch the cells until most nodes share one
+        low, high = np.percentile(pos, [1, 99], axis=0)
+        cell_width = max(float((high - low).max()), 1e-9) / size
+        ij = np.clip(np.floor((pos - low) / cell_width), 0, size - 1).astype(np.int64)
+        cell = ij[:, 0] * size + ij[:, 1]
+
+        #far field, from the other cells
+        density = np.bincount(cell, minlength=size * size).reshape(size, size).astype(float)
+        spectrum = np.fft.rfft2(density, self.shape)
+        field = []
+        for kernel in self.kernels:
+            full = np.fft.irfft2(spectrum * kernel, self.shape)
+            field.append(full[size - 1:2 * size - 1, size - 1:2 * size - 1][ij[:, 0], ij[:, 1]])
+        displacement = np.column_stack(field) * (k * k / cell_width)
+
+        #near field, every pair within a cell
+        u, v = same_cell_pairs(cell)
+        delta = pos[u] - pos[v]
+        distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+        push = delta * (k * k / distance ** 2)[:, None] #k^2 / d along the unit vector
+        for axis in range(2):
+            displacement[:, axis] += np.bincount(u, push[:, axis], n) - np.bincount(v, push[:, axis], n)
+        return displacement
+
+#all pairs of nodes that share a cell id, each pair once
+def same_cell_pairs(cell):
+    order = np.argsort(cell, kind='stable')
+    sorted_cells = cell[order]
+    group_end = np.searchsorted(sorted_cells, sorted_cells, side='right')
+    later = group_end - np.arange(len(cell)) - 1 #nodes after this one in its cell
+    first = np.repeat(np.arange(len(cell)), later)
+    offsets = np.arange(later.sum()) - np.repeat(np.cumsum(later) - later, later)
+    return order[first], order[first + 1 + offsets]
+
+#one Fruchterman-Reingold step for the given positions, returns the displacement of every node
+def forces(pos, edges, k, mesh):
+    n = len(pos)
+    displacement = mesh.repulsion(pos, k)
+
+    a = edges[:, 0]
+    b = edges[:, 1]
+    delta = pos[a] - pos[b]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+    pull = delta * (distance / k)[:, None] #d^2 / k along the unit vector
+    for axis in range(2):
+        displacement[:, axis] += np.bincount(b, pull[:, axis], n) - np.bincount(a, pull[:, axis], n)
+    return displacement
+
+#limit every node's move to the current temperature
+def step(pos, displacement, temperature):
+    length = np.maximum(np.hypot(displacement[:, 0], displacement[:, 1]), 1e-9)
+    pos += displacement * (np.minimum(length, temperature) / length)[:, None]
+
+def force_layout(n, edges, pos=None, iterations=30, k=None, rng=None):
+    #positions in (roughly) the unit square. starts from pos if given (e.g. generator coordinates), random otherwise
+    rng = rng if rng is not None else np.random.default_rng()
+    pos = rng.random((n, 2)) if pos is None else np.array(pos, dtype=float)
+    if n < 2:
+        return pos
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    k = k or 1.0 / math.sqrt(n) #ideal edge length
+    mesh = Mesh(int(min(256, max(32, 2 ** math.ceil(math.log2(math.sqrt(n))))))) #about one node per cell, capped
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        step(pos, forces(pos, edges, k, mesh), temperature)
+        temperature -= cooling
+    return pos
+
+def compute_layout(graph, method="auto", rng=None):
+    #graph is the dict returned by generators.generate. "spring" needs a networkx graph and is handled by the Simulator
+    if method == "auto":
+        method = "generator" if graph["pos"] is not None else "force"
+    if method == "generator":
+        if graph["pos"] is None:
+            raise ValueError("This graph model has no coordinates of its own, use the force layout instead.")
+        return np.array(graph["pos"], dtype=float)
+    if method == "force":
+        return force_layout(graph["n"], graph["edges"], graph["pos"], rng=rng)
+    raise ValueError(f"Unknown layout: {method}")
+
+def as_dict(pos):
+    return dict(enumerate(map(tuple, pos.tolist())))
+
+#observer that nudges the endpoints of new healing edges towards their neighbours after every DASH step:
+#   simulator.add_observer(IncrementalLayout())
+#positions live in simulator.pos, the observer keeps an array copy indexed by node id for the force computations, and
+#a grid of cells as wide as the furthest a pushing pair can be apart, so the nodes near the moving ones are found in the
+#3x3 cells around them instead of by measuring the distance to every node
+class IncrementalLayout:
+    def __init__(self, iterations=15, k=None):
+        self.iterations = iterations
+        self.k = k
+        self.xy = None
+        self.alive = None
+        self.scale = None #ideal edge length in layout units
+        self.cell_width = None
+        self.cell = None #node -> (i, j) of its grid cell
+        self.grid = {} #(i, j) -> nodes in that cell
+
+    def __call__(self, simulator, event): #observer hook
+        if event == "generate":
+            self.reset(simulator)
+        elif event == "delete" and self.alive is not None:
+            self.remove([simulator.last_deleted_node])
+        elif event == "round" and self.alive is not None:
+            self.remove(simulator.last_deleted_nodes)
+        elif event == "heal" and simulator.last_new_edges and self.xy is not None:
+            self.relax(simulator, {node for edge in simulator.last_new_edges for node in edge})
+
+    def reset(self, simulator):
+        self.grid = {}
+        if not simulator.pos:
+            self.xy = self.alive = self.cell = None
+            return
+        nodes = list(simulator.pos)
+        size = max(nodes) + 1
+        self.xy = np.zeros((size, 2))
+        self.alive = np.zeros(size, dtype=bool)
+        self.xy[nodes] = [simulator.pos[node] for node in nodes]
+        self.alive[nodes] = True
+        #ideal edge length from the area the bulk of the nodes occupy, so a few far out nodes don't inflate it
+        low, high = np.percentile(self.xy[nodes], [5, 95], axis=0)
+        area = float(np.prod(high - low)) / 0.81 or 1.0
+        self.scale = self.k or math.sqrt(area / len(nodes))
+        self.cell_width = self.reach()
+        self.cell = np.zeros((size, 2), dtype=np.int64)
+        self.place(np.array(nodes, dtype=np.int64))
+
+    def reach(self):
+        #furthest apart two nodes can start and still push on each other at some point of a relaxation: pushing reaches
+        #2 * scale, and each of the pair can move at most temperature * iterations / 2
+        return 2 * self.scale + 0.25 * self.scale * self.iterations
+
+    def place(self, nodes):
+        #(re)files nodes under the grid cell of their current position
+        cells = np.floor(self.xy[nodes] / self.cell_width).astype(np.int64)
+        for node, old, new in zip(nodes.tolist(), map(tuple, self.cell[nodes].tolist()), map(tuple, cells.tolist())):
+            if old == new and node in self.grid.get(new, ()):
+                continue
+            members = self.grid.get(old)
+            if members is not None:
+                members.discard(node)
+                if not members:
+                    del self.grid[old]
+            self.grid.setdefault(new, set()).add(node)
+        self.cell[nodes] = cells
+
+    def remove(self, nodes):
+        for node in nodes:
+            self.alive[node] = False
+            key = tuple(self.cell[node].tolist())
+            members = self.grid.get(key)
+            if members is not None:
+                members.discard(node)
+                if not members:
+                    del self.grid[key]
+
+    def near_pairs(self, moving, reach):
+        #(moving index, node) pairs closer than reach, from the 3x3 cells around every moving node
+        near = []
+        other = []
+        for i, (x, y) in enumerate(self.cell[moving].tolist()):
+            for cx in (x - 1, x, x + 1):
+                for cy in (y - 1, y, y + 1):
+                    members = self.grid.get((cx, cy))
+                    if members:
+                        near.extend([i] * len(members))
+                        other.extend(members)
+        near = np.array(near, dtype=np.int64)
+        other = np.array(other, dtype=np.int64)
+        delta = self.xy[moving][near] - self.xy[other]
+        keep = (np.hypot(delta[:, 0], delta[:, 1]) < reach) & (other != moving[near])
+        return near[keep], other[keep]
+
+    def relax(self, simulator, touched):
+        timer = simulator.timer
+        start = timer.start() if timer else None
+        k = self.scale
+        moving = np.array(sorted(touched), dtype=np.int64)
+        #pairs (moving index, neighbour node) for the attraction along edges
+        owners = []
+        neighbours = []
+        for i, node in enumerate(moving.tolist()):
+            for neighbour in simulator.G.neighbors(node):
+                owners.append(i)
+                neighbours.append(neighbour)
+        owners = np.array(owners, dtype=np.int64)
+        neighbours = np.array(neighbours, dtype=np.int64)
+
+        #(moving index, node) pairs close enough to push on each other at any point of the relaxation
+        temperature = 0.25 * k
+        near, other = self.near_pairs(moving, self.reach())
+
+        cooling = temperature / (self.iterations + 1)
+        for _ in range(self.iterations):
+            pos = self.xy[moving]
+            displacement = np.zeros_like(pos)
+
+            delta = pos[near] - self.xy[other]
+            distance = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+            push = delta * np.where(distance < 2 * k, k * k / distance ** 2, 0.0)[:, None]
+            delta = self.xy[neighbours] - pos[owners]
+            distance = np.hypot(delta[:, 0], delta[:, 1])
+            pull = delta * (distance / k)[:, None]
+            for axis in range(2):
+                displacement[:, axis] += np.bincount(near, push[:, axis], len(moving)) + np.bincount(owners, pull[:, axis], len(moving))
+
+            step(pos, displacement, temperature)
+            self.xy[moving] = pos
+            temperature -= cooling
+
+        self.place(moving)
+        for node, xy in zip(moving.tolist(), self.xy[moving].tolist()):
+            simulator.pos[node] = tuple(xy)
+        if timer:
+            timer.stop("relax", start)
@@ -0,0 +1,333 @@
+import math
+import random
+import time
+
+import numpy as np
+
+import dash
+import generators
+from connectivity import local_components
+
+LOCKSTEP_STRATEGIES = ("random", "max", "maxneighbour")
+
+#many small independent depletions advanced together: every step deletes one node from each unfinished graph and heals
+#it with DASH, with numpy doing the work for all graphs at once instead of one Simulator, networkx graph and dash.dash
+#call per trial. the graphs live in shared flat arrays, one row per graph padded to the largest graph:
+#   nbr[g, node, :deg[g, node]]  neighbours of node (-1 past the end), unordered
+#   heal[g, node, slot]          whether the edge in that slot was added by healing
+#   delta, dash_id, initial_dash_id, alive  per node attributes
+#the healing is the same as Simulator.partition + dash.dash, graph by graph: natural neighbours are partitioned by
+#dashID (representative: lowest initial dashID), healing neighbours are added and lose one delta, the members are
+#sorted by (delta, node id) into a complete binary tree whose missing edges are added as healing edges, and the
+#endpoints of new edges take the members' lowest dashID and gain one delta each.
+#every graph draws its victims from its own random.Random seeded like Simulator(seed), so the random strategy deletes
+#exactly the nodes a Simulator.run with the same seed does (on either backend). max and maxneighbour follow the same
+#rules but break ties differently (lowest node id, neighbours in slot order) than the simulator's indexes.
+
+def tree_positions(k_max):
+    #row k: heap position of the r-th smallest of k tree members, the layout of dash.btree
+    table = np.zeros((k_max + 1, max(k_max, 1)), dtype=np.int64)
+    for k in range(1, k_max + 1):
+        table[k, :k] = dash.inorder_positions(k)
+    return table
+
+def group_ranks(keys):
+    #position of every entry among the entries with the same key, in order of appearance
+    order = np.argsort(keys, kind='stable')
+    ordered = keys[order]
+    first = np.ones(len(ordered), dtype=bool)
+    first[1:] = ordered[1:] != ordered[:-1]
+    starts = np.flatnonzero(first)
+    ranks = np.empty(len(keys), dtype=np.int64)
+    ranks[order] = np.arange(len(keys)) - np.repeat(starts, np.diff(np.append(starts, len(keys))))
+    return ranks
+
+class LockstepBatch:
+    def __init__(self, graphs, rngs=None):
+        #graphs: dicts from generators.generate. rngs: one random.Random per graph for the victim choices
+        self.graphs = len(graphs)
+        self.size = max(graph["n"] for graph in graphs)
+        shape = (self.graphs, self.size)
+        self.alive = np.zeros(shape, dtype=bool)
+        self.deg = np.zeros(shape, dtype=np.int64)
+        self.delta = np.zeros(shape, dtype=np.int64)
+        self.dash_id = np.zeros(shape)
+        self.initial_dash_id = np.zeros(shape)
+        self.count = np.array([graph["n"] for graph in graphs], dtype=np.int64)
+        #alive nodes packed at the front of order[g], slot[g, node] is the node's position in it: the random_node order of
+        #ArrayGraph and priorityindex.NodeSampler
+        self.order = np.tile(np.arange(self.size, dtype=np.int64), (self.graphs, 1))
+        self.slot = self.order.copy()
+        self.starting_nodes = self.count.copy()
+
+        degrees = [np.bincount(graph["edges"].ravel(), minlength=graph["n"]) for graph in graphs]
+        capacity = max((int(degree.max()) for degree in degrees if len(degree)), default=1)
+        self.nbr = np.full((*shape, max(capacity, 1)), -1, dtype=np.int32)
+        self.heal = np.zeros(self.nbr.shape, dtype=bool)
+        for g, graph in enumerate(graphs):
+            n = graph["n"]
+            self.alive[g, :n] = True
+            self.delta[g, :n] = graph["delta"]
+            self.dash_id[g, :n] = graph["dashID"]
+            self.initial_dash_id[g, :n] = graph["initial_dashID"]
+            edges = graph["edges"]
+            if len(edges):
+                self.add_edges(np.full(len(edges), g), edges[:, 0], edges[:, 1], healing=False)
+        self.positions = tree_positions(self.nbr.shape[2])
+
+        self.rngs = rngs if rngs is not None else [random.Random() for _ in graphs]
+        self.steps = np.zeros(self.graphs, dtype=np.int64)
+        self.highest_max_delta = np.zeros(self.graphs, dtype=np.int64)
+        self.nodes_when_highest_delta = np.full(self.graphs, -1, dtype=np.int64)
+        self.highest_max_degree = np.zeros(self.graphs, dtype=np.int64)
+        self.nodes_when_highest_degree = np.full(self.graphs, -1, dtype=np.int64)
+        self.first_disconnect_step = np.full(self.graphs, -1, dtype=np.int64)
+        self.nodes_when_first_disconnect = np.full(self.graphs, -1, dtype=np.int64)
+        self.known_connected = np.zeros(self.graphs, dtype=bool)
+        self.known_connected[:] = self.connected(np.arange(self.graphs))
+        self.elapsed_time = 0.0
+
+    @classmethod
+    def generate(cls, nodes, seeds, model="geometric", **params):
+        #one graph per seed, the same graph (and victim random stream) as Simulator(seed).generate_graph(nodes, model)
+        rngs = [random.Random(seed) for seed in seeds]
+        graphs = [generators.generate(model, nodes, np.random.default_rng(rng.getrandbits(64)), **params) for rng in rngs]
+        return cls(graphs, rngs)
+
+    def reserve(self, slots):
+        #room for at least slots neighbours per node
+        capacity = self.nbr.shape[2]
+        if slots <= capacity:
+            return
+        extra = max(slots, 2 * capacity) - capacity
+        self.nbr = np.pad(self.nbr, ((0, 0), (0, 0), (0, extra)), constant_values=-1)
+        self.heal = np.pad(self.heal, ((0, 0), (0, 0), (0, extra)))
+        self.positions = tree_positions(self.nbr.shape[2])
+
+    def add_edges(self, graphs, u, v, healing=True):
+        #edges (graphs[i], u[i], v[i]), none of which may exist yet
+        graphs = np.concatenate((graphs, graphs))
+        ends = np.concatenate((u, v))
+        others = np.concatenate((v, u))
+        keys = graphs * self.size + ends
+        slots = self.deg[graphs, ends] + group_ranks(keys) #several new edges can share an endpoint
+        if len(slots):
+            self.reserve(int(slots.max()) + 1)
+        self.nbr[graphs, ends, slots] = others
+        self.heal[graphs, ends, slots] = healing
+        np.add.at(self.deg, (graphs, ends), 1)
+
+    def remove_nodes(self, graphs, victims, entry_graphs, entry_nodes, entry_victims):
+        #one victim per graph. entries are the victims' neighbours, each with its graph and victim
+        rows = self.nbr[entry_graphs, entry_nodes]
+        slots = np.argmax(rows == entry_victims[:, None], axis=1)
+        last = self.deg[entry_graphs, entry_nodes] - 1
+        self.nbr[entry_graphs, entry_nodes, slots] = self.nbr[entry_graphs, entry_nodes, last] #swap the last slot in
+        self.heal[entry_graphs, entry_nodes, slots] = self.heal[entry_graphs, entry_nodes, last]
+        self.nbr[entry_graphs, entry_nodes, last] = -1
+        self.heal[entry_graphs, entry_nodes, last] = False
+        self.deg[entry_graphs, entry_nodes] -= 1
+
+        self.nbr[graphs, victims] = -1
+        self.heal[graphs, victims] = False
+        self.deg[graphs, victims] = 0
+        self.alive[graphs, victims] = False
+        last = self.order[graphs, self.count[graphs] - 1] #swap the last alive node into the victim's slot
+        slots = self.slot[graphs, victims]
+        self.order[graphs, slots] = last
+        self.slot[graphs, last] = slots
+        self.count[graphs] -= 1
+
+    def choose_victims(self, graphs, strategy):
+        if strategy == "max":
+            return np.argmax(np.where(self.alive[graphs], self.deg[graphs], -1), axis=1)
+        if strategy == "maxneighbour":
+            best = np.argmax(np.where(self.alive[graphs], self.deg[graphs], -1), axis=1)
+            victims = np.empty(len(graphs), dtype=np.int64)
+            isolated = []
+            for i, (g, node) in enumerate(zip(graphs.tolist(), best.tolist())):
+                degree = int(self.deg[g, node])
+                if degree:
+                    victims[i] = self.nbr[g, node, self.rngs[g].randrange(degree)]
+                else: #only isolates left, Simulator.run falls back to a random node too
+                    isolated.append(i)
+            if isolated:
+                isolated = np.array(isolated)
+                victims[isolated] = self.choose_victims(graphs[isolated], "random")
+            return victims
+        if strategy == "random":
+            #the same draw as Simulator.random_node
+            picks = np.array([self.rngs[g].randrange(int(self.count[g])) for g in graphs.tolist()], dtype=np.int64)
+            return self.order[graphs, picks]
+        raise ValueError(f"Unknown lockstep strategy: {strategy} (one of {', '.join(LOCKSTEP_STRATEGIES)})")
+
+    def step(self, strategy="random", victims=None):
+        #one deletion + healing in every graph with more than one node left, returns the graphs that took part.
+        #victims (one per taking part graph) overrides the strategy
+        graphs = np.flatnonzero(self.count > 1)
+        if not len(graphs):
+            return graphs
+        victims = self.choose_victims(graphs, strategy) if victims is None else np.asarray(victims, dtype=np.int64)
+        dropped, members = self.delete_and_heal(graphs, victims)
+        self.steps[graphs] += 1
+        self.record_stats(graphs, dropped, members)
+        return graphs
+
+    def delete_and_heal(self, graphs, victims):
+        #returns the natural neighbours that were left out of the tree (only they can end up split off) and the tree
+        #members, both as (entry, node) arrays sorted by entry, where entry indexes into graphs
+        S = len(graphs)
+        rows = self.nbr[graphs, victims]
+        entry, column = np.nonzero(rows >= 0) #entry: index into graphs of every neighbour of a victim
+        nodes = rows[entry, column].astype(np.int64)
+        healing = self.heal[graphs, victims][entry, column]
+        entry_graphs = graphs[entry]
+
+        #1. natural neighbours partitioned by dashID, lowest initial dashID represents its partition
+        natural = ~healing
+        ne, nn, ng = entry[natural], nodes[natural], entry_graphs[natural]
+        order = np.lexsort((self.initial_dash_id[ng, nn], self.dash_id[ng, nn], ne))
+        ne, nn, ng = ne[order], nn[order], ng[order]
+        ids = self.dash_id[ng, nn]
+        first = np.ones(len(ne), dtype=bool)
+        first[1:] = (ne[1:] != ne[:-1]) | (ids[1:] != ids[:-1])
+        dropped = (ne[~first], nn[~first])
+
+        #2. healing neighbours join the tree and lose the healing edge to the victim
+        he, hn = entry[healing], nodes[healing]
+        self.delta[graphs[he], hn] -= 1
+
+        self.remove_nodes(graphs, victims, entry_graphs, nodes, victims[entry])
+
+        #3. reconstruction tree: members by ascending (delta, id) laid out in a complete binary tree
+        me = np.concatenate((ne[first], he))
+        mn = np.concatenate((nn[first], hn))
+        mg = graphs[me]
+        order = np.lexsort((mn, self.delta[mg, mn], me))
+        me, mn, mg = me[order], mn[order], mg[order]
+        k = np.bincount(me, minlength=S)
+        rank = np.arange(len(me)) - (np.cumsum(k) - k)[me]
+        position = self.positions[k[me], rank]
+        slots = np.full((S, max(1, int(k.max(initial=0)))), -1, dtype=np.int64)
+        slots[me, position] = mn
+        child = position > 0
+        te, tc, tg = me[child], mn[child], mg[child]
+        tp = slots[te, (position[child] - 1) // 2]
+
+        #4. tree edges that don't exist yet become healing edges
+        new = ~(self.nbr[tg, tp] == tc[:, None]).any(axis=1)
+        te, tg, tp, tc = te[new], tg[new], tp[new], tc[new]
+        if len(te):
+            lowest = np.full(S, np.inf)
+            np.minimum.at(lowest, me, self.dash_id[mg, mn]) #members' lowest dashID, before any is replaced
+            self.add_edges(tg, tp, tc)
+            self.dash_id[tg, tp] = lowest[te]
+            self.dash_id[tg, tc] = lowest[te]
+            np.add.at(self.delta, (tg, tp), 1)
+            np.add.at(self.delta, (tg, tc), 1)
+        return dropped, (me, mn)
+
+    def record_stats(self, graphs, dropped, members):
+        #running maxima like Simulator.record_progress, after every step
+        alive = self.alive[graphs]
+        nodes = self.count[graphs]
+        max_delta = np.where(alive, self.delta[graphs], 0).max(axis=1)
+        max_degree = np.where(alive, self.deg[graphs], 0).max(axis=1)
+        higher = max_delta > self.highest_max_delta[graphs]
+        self.highest_max_delta[graphs[higher]] = max_delta[higher]
+        self.nodes_when_highest_delta[graphs[higher]] = nodes[higher]
+        higher = max_degree > self.highest_max_degree[graphs]
+        self.highest_max_degree[graphs[higher]] = max_degree[higher]
+        self.nodes_when_highest_degree[graphs[higher]] = nodes[higher]
+
+        #a connected graph stays connected when every neighbour of the victim joined the tree: every piece left by the
+        #deletion holds a neighbour, and the tree joins them. so only graphs that left some out are checked, with a local
+        #search from those neighbours back to the tree, and only until they first disconnect. graphs that weren't
+        #connected to begin with get a full check instead
+        check = self.first_disconnect_step[graphs] < 0
+        unknown = check & ~self.known_connected[graphs]
+        left_out = np.zeros(len(graphs), dtype=bool)
+        left_out[dropped[0]] = True
+        local = np.flatnonzero(check & left_out & ~unknown)
+        split = []
+        if len(local):
+            entries, left_out_nodes = dropped
+            bounds = np.searchsorted(entries, np.append(local, local + 1).reshape(2, -1))
+            first_member = members[1][np.searchsorted(members[0], local)] #all members are joined by the tree, one will do
+            for entry, start, stop, member in zip(local.tolist(), bounds[0].tolist(), bounds[1].tolist(), first_member.tolist()):
+                if not self.tree_reaches(int(graphs[entry]), member, left_out_nodes[start:stop].tolist()):
+                    split.append(graphs[entry])
+        split = np.array(split, dtype=np.int64)
+        self.known_connected[split] = False
+
+        checked = graphs[unknown]
+        if len(checked):
+            connected = self.connected(checked)
+            self.known_connected[checked] = connected
+            split = np.concatenate((split, checked[~connected]))
+        self.first_disconnect_step[split] = self.steps[split]
+        self.nodes_when_first_disconnect[split] = self.count[split]
+
+    def tree_reaches(self, g, member, nodes):
+        #whether every node in nodes is still connected to member in graph g: interleaved searches from all of them, which
+        #stop as soon as they have all met, or as soon as one runs out of nodes to visit (a piece that was cut off)
+        nbr, deg = self.nbr[g], self.deg[g]
+        def neighbors(node):
+            return nbr[node, :deg[node]].tolist()
+        return not local_components(None, [member, *nodes], neighbors=neighbors, first=True)
+
+    def connected(self, graphs):
+        #per graph, whether its alive nodes form one component: min label propagation with pointer jumping
+        S = len(graphs)
+        if not S:
+            return np.zeros(0, dtype=bool)
+        alive = self.alive[graphs]
+        sentinel = self.size #label of dead nodes and empty slots
+        labels = np.where(alive, np.arange(self.size), sentinel)
+        neighbours = np.where(self.nbr[graphs] >= 0, self.nbr[graphs], sentinel)
+        active = np.arange(S) #graphs whose labels still change, converged ones drop out
+        while len(active):
+            current = labels[active]
+            rows = np.arange(len(active))[:, None]
+            padding = np.full((len(active), 1), sentinel)
+            extended = np.concatenate((current, padding), axis=1)
+            updated = np.minimum(current, extended[rows[:, :, None], neighbours[active]].min(axis=2))
+            updated = np.concatenate((updated, padding), axis=1)[rows, updated] #jump to the label's label
+            changed = (updated != current).any(axis=1)
+            labels[active] = updated
+            active = active[changed]
+        lowest = np.where(alive, labels, sentinel).min(axis=1)
+        highest = np.where(alive, labels, -1).max(axis=1)
+        return lowest == highest
+
+    def run(self, strategy="random"):
+        #steps until every graph is down to one node, returns one summary per graph with Simulator.run's keys
+        start = time.time()
+        while self.step(strategy).size:
+            pass
+        self.elapsed_time += time.time() - start
+        return self.summaries(strategy)
+
+    def summaries(self, strategy):
+        share = self.elapsed_time / self.graphs #one run times all graphs, each gets an equal share
+        def optional(value):
+            return None if value < 0 else int(value)
+        return [{
+            "strategy": strategy,
+            "log_n": 2 * math.log(int(self.starting_nodes[g])),
+            "highest_max_delta": int(self.highest_max_delta[g]),
+            "nodes_when_highest_delta": optional(self.nodes_when_highest_delta[g]),
+            "highest_max_degree": int(self.highest_max_degree[g]),
+            "nodes_when_highest_degree": optional(self.nodes_when_highest_degree[g]),
+            "ever_disconnected": bool(self.first_disconnect_step[g] >= 0),
+            "nodes_when_first_disconnect": optional(self.nodes_when_first_disconnect[g]),
+            "first_disconnect_step": optional(self.first_disconnect_step[g]),
+            "elapsed_time": share,
+        } for g in range(self.graphs)]
+
+    def edges(self, g):
+        #(u, v, is_healing) of graph g with u < v, for comparing against a Simulator's graph
+        nodes, slots = np.nonzero(self.nbr[g] >= 0)
+        others = self.nbr[g][nodes, slots]
+        keep = nodes < others
+        return set(zip(nodes[keep].tolist(), others[keep].tolist(), self.heal[g][nodes, slots][keep].tolist()))
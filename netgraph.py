@@ -1,34 +1,24 @@
 import tkinter as tk
-from tkinter import Frame, messagebox
-import networkx as nx
-import matplotlib.pyplot as plt
+from tkinter import Frame, messagebox, ttk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import random
-from matplotlib.colors import Normalize
-from matplotlib.cm import ScalarMappable
-from collections import defaultdict
+import logging
 import math
-import time
 import os
+import queue
+import threading
+import time
+from contextlib import ExitStack
 
-import dash
+from framepipeline import FrameRecorder
+from pathmetrics import PathMetrics
+from phasetimer import PhaseTimer, profiled
+from renderer import GraphRenderer, snapshot
+from simulator import Simulator
 
-def connect_graph(graph):
-    if nx.is_connected(graph):
-        return graph
-    
-    components = list(nx.connected_components(graph))
-    largest_component = components[0]
+logger = logging.getLogger(__name__)
 
-    for component in components[1:]:
-        node_in_largest = next(iter(largest_component))
-        node_in_component = next(iter(component))
-        
-        graph.add_edge(node_in_largest, node_in_component)
-        
-        largest_component.update(component)
-    
-    return graph
+AUTOPLAY_FPS = 10 #autoplay redraws per second at most, the states in between are skipped
+AUTOPLAY_POLL_MS = 25 #how often the window checks for news from the autoplay worker
 
 class NetGraph:
     def __init__(self, root):
@@ -61,6 +51,12 @@ class NetGraph:
         self.delete_maxneighbour_button = tk.Button(self.frame, text="Delete [Neighbour of Most Connections]", command=self.delete_maxneighbour_node, bg='orangered')
         self.delete_maxneighbour_button.pack()
 
+        self.delete_articulation_button = tk.Button(self.frame, text="Delete [Cut Vertex]", command=self.delete_articulation_node, bg='orangered')
+        self.delete_articulation_button.pack()
+
+        self.delete_bridge_button = tk.Button(self.frame, text="Delete [Bridge Endpoint]", command=self.delete_bridge_node, bg='orangered')
+        self.delete_bridge_button.pack()
+
         self.healing_label = tk.Label(self.frame, text="=== Healing Strategies ===")
         self.healing_label.pack()
 
@@ -70,6 +66,34 @@ class NetGraph:
         self.debug_button = tk.Button(self.frame, text="DEBUG (Autoplay)", command=self.Automatic, bg='blue')
         self.debug_button.pack()
 
+        self.time_autoplay = tk.BooleanVar(value=False)
+        self.timings_button = tk.Checkbutton(self.frame, text="Time Autoplay phases", variable=self.time_autoplay)
+        self.timings_button.pack()
+
+        self.measure_autoplay = tk.BooleanVar(value=False)
+        self.metrics_button = tk.Checkbutton(self.frame, text="Autoplay path metrics", variable=self.measure_autoplay)
+        self.metrics_button.pack()
+
+        self.profile_autoplay = tk.BooleanVar(value=False)
+        self.profile_button = tk.Checkbutton(self.frame, text="Profile Autoplay (cProfile)", variable=self.profile_autoplay)
+        self.profile_button.pack()
+
+        #autoplay progress and controls
+        self.autoplay_progress = ttk.Progressbar(self.frame, length=200, mode='determinate')
+        self.autoplay_progress.pack()
+
+        self.autoplay_status = tk.Label(self.frame, text="")
+        self.autoplay_status.pack()
+
+        self.pause_button = tk.Button(self.frame, text="Pause", command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_button.pack()
+
+        self.cancel_button = tk.Button(self.frame, text="Cancel", command=self.cancel_autoplay, state=tk.DISABLED)
+        self.cancel_button.pack()
+
+        self.autoplay = None #the running Autoplay, None when idle
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+
         #disconnected graph warning
         self.warning_label = tk.Label(self.frame, text="", fg="red")
         self.warning_label.pack()
@@ -89,79 +113,15 @@ class NetGraph:
         self.nodenumber = tk.Label(self.frame, text="Number of Nodes: N/A")
 
         self.canvas = None
-        self.G = None #g = graph
-        self.healcount = 0
-
-    def debug(self):
-        print(self.partition(self.G, 1))
-
-    def partition(self, node):
-        neighbors = list(self.G.neighbors(node))
-        #remove neighbours added via healing edge so we're only left with natural neighbors
-        filterlist = self.get_healing_neighbors(node)
-        if len(filterlist) > 0:
-            for i in filterlist:
-                neighbors.remove(i)
-
-        print(f"Natural Neighbors of deleted node {node}: {neighbors}")
-
-        # Partitioning the neighbors based on their IDs
-        partitions = {}
-        for neighbor in neighbors:
-            # Assuming each node has a randomly assigned ID
-            node_id = self.G.nodes[neighbor]['dashID']
-            if node_id not in partitions:
-                partitions[node_id] = []
-            partitions[node_id].append(neighbor)
-            print(f"Neighbor {neighbor} with dashID {node_id} added to partition")
-
-        # Select unique representatives from each partition
-        unique_neighbors = []
-        for partition_id, partition in partitions.items():
-            # Choose the neighbor with the lowest initial ID
-            representative = min(partition, key=lambda x: self.G.nodes[x]['initial_dashID'])
-            unique_neighbors.append(representative)
-            print(f"Partition {partition_id} representatives: {partition}, selected: {representative} (via initial ID {self.G.nodes[representative]['initial_dashID']})")
-
-        print(f"Unique neighbors for deleted node {node}: {unique_neighbors}")
-        return unique_neighbors
-
-    def get_healing_neighbors(self, node):
-        if self.G is None:
-            print("Graph is None, returning empty list.")
-            return []
-
-        healing_neighbors = []
-        for u, v in self.valid_new_edges:
-            if u == node:
-                healing_neighbors.append(v)
-                print(f"Node {node} is connected to {v} via healing edge.")
-            elif v == node:
-                healing_neighbors.append(u)
-                print(f"Node {node} is connected to {u} via healing edge.")
-        
-        print(f"Healing neighbors for node {node}: {healing_neighbors}")
-        return healing_neighbors
-
-    def handle_deletion(self, node):
-        print(f"==Deletion event: Node {node}===")
-        self.last_deleted_node = node
-        self.last_deleted_node_neighbours_list = self.partition(node)
-
-        #process healing neighbours (add them to list of deleted node's neighbours and decrement their delta value)
-        templist = self.get_healing_neighbors(node)
-        for i in templist:
-            self.last_deleted_node_neighbours_list.append(i)
-            self.G.nodes[i]['delta'] -= 1
+        self.renderer = GraphRenderer() #persistent figure, updated in place every step
+        self.simulator = Simulator() #holds the graph and all DASH state, this window only draws it
 
-        self.G.remove_node(node)
-
-        if node in self.pos:
-            del self.pos[node] #remove pos from dictionary
-        print(f"===Deletion conclusion===")
+    @property
+    def G(self):
+        return self.simulator.G
 
     def check_connectedness(self):
-        if not nx.is_connected(self.G):
+        if not self.simulator.connectivity.is_connected():
             self.warning_label.config(text="Warning: The graph is disconnected!")
         else:
             self.warning_label.config(text="")
@@ -171,107 +131,46 @@ class NetGraph:
             nodenumber = int(self.node_entry.get())
             if nodenumber <= 0:
                 raise ValueError("Number of nodes must be positive.")
-            
-            self.pos = {} #dictionary to store node positions
-            self.last_deleted_node = None
-            self.last_deleted_node_neighbours_list = None #contains unique neighbours (not sharing the same dashID) of the last deleted node
-            self.new_edges = [] #list of new edges created via healing
-            self.healcount = 0
-            
-            #higher power = smaller radius
-            power = 0.5
-            radius = 1.0 / (nodenumber ** power) #make radius smaller if more nodes
-
-            #use networkx to generate a random graph.
-            self.G = nx.random_geometric_graph(n=nodenumber, radius=radius)
-            self.G = connect_graph(self.G)
-            
-
-            #initialize node deltas (degrees changed) and DASH ID
-            for node in self.G.nodes():
-                id = random.random() #random float between 0 and 1
-                
-                self.G.nodes[node]['delta'] = 0
-                self.G.nodes[node]['dashID'] = id
-                self.G.nodes[node]['initial_dashID'] = id
 
             #if previous graph exists, clear it
             if self.canvas:
                 if not messagebox.askyesno("Confirmation", "Do you want to generate a new graph?"):
                     return
-            
-                self.canvas.get_tk_widget().destroy()
-                plt.close('all') #clear prev figure
                 messagebox.showwarning("Warning", "Previous graph cleared!")
 
+            self.simulator.generate_graph(nodenumber, layout=True)
+
             logn = 2 * math.log(self.G.number_of_nodes())
             self.logNcount.config(text=f"2 Log(n): {logn}")
 
-            self.pos = nx.spring_layout(self.G, k=0.4, iterations=7) #initial node positions are stored in self.pos
-            self.draw_graph()
+            #one figure and canvas per session, new graphs just reset the existing artists
+            if self.canvas is None:
+                self.canvas = FigureCanvasTkAgg(self.renderer.fig, master=self.frame)
+                self.canvas.get_tk_widget().pack()
+                self.renderer.attach(self.canvas)
+            self.renderer.reset(self.simulator)
+            self.update_labels()
 
         except ValueError as e:
             messagebox.showerror("Input Error", str(e))
 
-    def draw_graph(self):
-        fig, ax = plt.subplots(figsize=(10, 8))
-
-        #calculate colourmap (based on node degrees)
-        degrees = dict(self.G.degree())
-        
-        if degrees: #make sure degrees isnt empty
-            normalized = Normalize(vmin=1, vmax=max(degrees.values()))
-            colormap = plt.cm.coolwarm
-        else:
-            normalized = Normalize(vmin=1, vmax=1)
-            colormap = plt.cm.coolwarm
-
-        #give unconnected nodes a distinct colour
-        node_colors = [
-            '#515151' if degrees[node] == 0 else colormap(normalized(degrees[node]))
-            for node in self.G.nodes()
-        ] #if node has connections, colour is determined by normalised colormap. lower bound is 1, upper bound is current maximum degree within the network (within the current iteration)
-
-        labels = {node: f"nID: {node}\nDashID: {self.G.nodes[node].get('dashID'):.3f}\nDelta: {self.G.nodes[node].get('delta')}" for node in self.G.nodes()}
-        
-        #draw network
+    def update_labels(self):
         self.check_connectedness()
-        nx.draw(self.G, self.pos, ax=ax, with_labels=True, labels=labels, node_color=node_colors, node_size=500, font_size=8, edge_color='grey')
-        self.valid_new_edges = [(u, v) for u, v in self.new_edges if u in self.G.nodes() and v in self.G.nodes()]
-        nx.draw_networkx_edges(self.G, self.pos, edgelist=self.valid_new_edges, edge_color='red', ax=ax, width=1.5)
-
-        #add colorbar
-        scalarmap = plt.cm.ScalarMappable(cmap=colormap, norm=normalized)
-        scalarmap.set_array([])
-        colorbar = fig.colorbar(scalarmap, ax=ax, orientation='horizontal', pad=0.1)
-        colorbar.set_label('Node Degree (Connections per Node)')
-
-        highest_delta = 0
-        for node in self.G.nodes():
-            if self.G.nodes[node]['delta'] > highest_delta:
-                highest_delta = self.G.nodes[node]['delta']
-        self.highest_delta_label.config(text=f"Highest Delta: {highest_delta}")
-
+        self.highest_delta_label.config(text=f"Highest Delta: {self.simulator.delta_index.max()}")
         self.nodenumber.config(text=f"Number of Nodes: {self.G.number_of_nodes()}")
-
-        self.highest_degree_label.config(text=f"Highest Degree: {max(degrees.values())}")
-
+        self.highest_degree_label.config(text=f"Highest Degree: {self.simulator.degree_index.max()}")
         self.nodecount_label.config(text=f"Node Count: {self.G.number_of_nodes()}")
 
-        self.canvas = FigureCanvasTkAgg(fig, master=self.frame)
-        self.canvas.draw()
-        self.canvas.get_tk_widget().pack()
+    def draw_graph(self):
+        self.renderer.update(self.simulator)
+        self.update_labels()
 
     def delete_random_node(self):
         if self.G is None or len(self.G) == 0:
             messagebox.showwarning("Warning", "No graph exists!")
             return
 
-        node_deletion_target = random.choice(list(self.G.nodes()))
-        self.handle_deletion(node_deletion_target)
-
-        plt.close('all') #clear prev figure
-        self.canvas.get_tk_widget().destroy() #clear prev canvas
+        self.simulator.delete_random_node()
         self.draw_graph()
 
     def delete_max_node(self):
@@ -279,11 +178,7 @@ class NetGraph:
             messagebox.showwarning("Warning", "No graph exists!")
             return
         
-        max_node = max(self.G.degree, key=lambda x: x[1])[0] #get node with max edge count
-        self.handle_deletion(max_node)
-
-        plt.close('all') #clear prev figure
-        self.canvas.get_tk_widget().destroy() #clear prev canvas
+        self.simulator.delete_max_node()
         self.draw_graph()
 
 
@@ -292,51 +187,54 @@ class NetGraph:
             messagebox.showwarning("Warning", "No graph exists!")
             return
         
-        max_node = max(self.G.degree, key=lambda x: x[1])[0] #get node with max edge count
-        max_node_neighbours = list(self.G.neighbors(max_node))
-
         try:
-            self.handle_deletion(random.choice(max_node_neighbours))
+            self.simulator.delete_maxneighbour_node()
         except IndexError as e:
             messagebox.showerror("All nodes in graph are isolates!", str(e))
 
-        plt.close('all') #clear prev figure
-        self.canvas.get_tk_widget().destroy() #clear prev canvas
         self.draw_graph()
 
+    def delete_articulation_node(self):
+        if self.G is None or len(self.G) == 0:
+            messagebox.showwarning("Warning", "No graph exists!")
+            return
 
-    #network healing (singular step) per Degree Assisted Self-Healing algorithm described by Dr Amitabh Trehan
-    #currently unimplemented
-    def DASH_healingstep(self):
+        try:
+            self.simulator.delete_articulation_node()
+        except IndexError as e:
+            messagebox.showerror("No cut vertices left!", str(e))
 
-        print(f"=== DASH operation {self.healcount} initiated ===")
-        returned_new_edges = []
-        self.G, returned_new_edges = dash.dash(self.G, self.last_deleted_node, self.last_deleted_node_neighbours_list)
+        self.draw_graph()
 
-        for i, j in returned_new_edges:
-            self.new_edges.append((i, j))
-            self.G.nodes[i]['delta'] += 1
-            self.G.nodes[j]['delta'] += 1
+    def delete_bridge_node(self):
+        if self.G is None or len(self.G) == 0:
+            messagebox.showwarning("Warning", "No graph exists!")
+            return
 
-        print(f"New edges created in this healing step: {returned_new_edges}")
-        self.valid_new_edges = [(u, v) for u, v in self.new_edges if u in self.G.nodes() and v in self.G.nodes()]
-        print(f"New existant edges created since graph creation: {self.valid_new_edges}")
+        try:
+            self.simulator.delete_bridge_node()
+        except IndexError as e:
+            messagebox.showerror("No bridges left!", str(e))
 
-        plt.close('all') #clear prev figure
-        self.canvas.get_tk_widget().destroy() #clear prev canvas
         self.draw_graph()
-        self.healcount += 1
-        print(f"=== DASH operation complete ===")
-        return returned_new_edges #this is only ever used by the Automatic function if its running. can be ignored otherwise.
 
-    def Automatic(self): #delete random nodes, heal, log output until no nodes are left. good for bulk testing.
-        print(f"=== Automation initiated ===")
 
-        LogN = 2 * math.log(self.G.number_of_nodes())
-        #maximal values encountered since automation start
-        highestMaxDelta = 0
-        highestMaxDegree = 0
-        everDisconnected = False
+    #network healing (singular step) per Degree Assisted Self-Healing algorithm described by Dr Amitabh Trehan
+    def DASH_healingstep(self):
+        if self.G is None:
+            messagebox.showwarning("Warning", "No graph exists!")
+            return
+
+        returned_new_edges = self.simulator.DASH_healingstep()
+        self.draw_graph()
+        return returned_new_edges
+
+    def Automatic(self): #delete random nodes, heal, log output until no nodes are left. good for bulk testing.
+        if self.G is None:
+            messagebox.showwarning("Warning", "No graph exists!")
+            return
+        if self.autoplay is not None:
+            return
 
         output_dir = "auto_output"
         if not os.path.exists(output_dir):
@@ -347,70 +245,182 @@ class NetGraph:
                 if os.path.isfile(file_path):
                     os.unlink(file_path)
 
-        with open("automatic_log_output.txt", "w", encoding='utf-8') as file: #this will also overwrite the log if it already exists
-
-            startTime = time.time()
-            while len(self.G) > 1:
-
-                self.delete_random_node()
-                file.write(f"Node {self.last_deleted_node} was deleted. \n")                
-
-                edgelist = self.DASH_healingstep() #function also updates graph. return value is new edges
-                file.write(f"DASH healing step was performed. New edges: {edgelist}\n")
-
-                filename = f"{output_dir}/{len(self.G)}.png"
-                plt.savefig(filename)
-
-                #values of current iteration
-                curMaxDelta = max([self.G.nodes[node]['delta'] for node in self.G.nodes()])
-                curMaxDegree = max(dict(self.G.degree()).values())
-
-                #check cur values exceed max, if so update them
-                #write cur values to file
-
-                print(f"Stats for graph with {len(self.G)} nodes remaining: Current max delta is {curMaxDelta}, current max degree is {curMaxDegree}.\n")
-                file.write(f"Stats for graph with {len(self.G)} nodes remaining: Current max delta is {curMaxDelta}, current max degree is {curMaxDegree}.\n")
-
-                if curMaxDelta > highestMaxDelta:
-                    highestMaxDelta = curMaxDelta
-                    nodesWhenHighestDelta = len(self.G)
-                    file.write(f"New highest delta value found: {curMaxDelta}. Currently {nodesWhenHighestDelta} remaining.\n")
-
-                if curMaxDegree > highestMaxDegree:
-                    highestMaxDegree = curMaxDegree
-                    nodesWhenHighestDegree = len(self.G)
-                    file.write(f"New highest degree value found: {curMaxDegree}. Currently {nodesWhenHighestDegree} remaining.\n")
-
-                if not nx.is_connected(self.G):
-                    if not everDisconnected:
-                        everDisconnected = True
-                        nodesWhenFirstDisconnect = len(self.G)
-                        file.write(f"Graph is disconnected for the first time! Currently {nodesWhenFirstDisconnect} nodes remaining.\n")
-                    else:
-                        file.write(f"Graph is currently disconnected!\n")
-
-            #when there is one node left
-            endTime = time.time()
-            file.write(f"=== Graph is now depleted of nodes. Summarizing information below ===\n")
-            elapsedTime = endTime - startTime
-            
-            #todo: write max values to log
-            file.write(f"Highest delta value encountered: {highestMaxDelta}. Encountered when {nodesWhenHighestDelta} nodes were remaining.\n")
-            file.write(f"Highest degree value encountered: {highestMaxDegree}. Encountered when {nodesWhenHighestDegree} nodes were remaining.\n")
-            file.write(f"2 Log(n) value: {LogN}.\n")
-
-            if everDisconnected:
-                file.write(f"Graph first became disconnected when {nodesWhenFirstDisconnect} nodes were remaining.\n")
+        #the run goes to a worker thread, this thread only polls it for states to draw
+        self.autoplay = Autoplay(self.simulator, output_dir, profile=self.profile_autoplay.get(), timings=self.time_autoplay.get(), metrics=self.measure_autoplay.get())
+        self.autoplay_progress.config(maximum=max(1, len(self.G) - 1), value=0)
+        self.autoplay_status.config(text="Autoplay running...")
+        self.set_autoplay_controls(True)
+        self.autoplay.start()
+        self.root.after(AUTOPLAY_POLL_MS, self.poll_autoplay)
+
+    def set_autoplay_controls(self, running):
+        #while an autoplay runs, only pause/cancel are usable, everything else would change the graph under the worker
+        for button in (self.generate_button, self.delete_button, self.delete_max_button, self.delete_maxneighbour_button,
+                       self.delete_articulation_button, self.delete_bridge_button, self.dash_button, self.debug_button,
+                       self.timings_button, self.metrics_button, self.profile_button):
+            button.config(state=tk.DISABLED if running else tk.NORMAL)
+        for button in (self.pause_button, self.cancel_button):
+            button.config(state=tk.NORMAL if running else tk.DISABLED)
+        self.pause_button.config(text="Pause")
+
+    def poll_autoplay(self):
+        autoplay = self.autoplay
+        latest = None
+        done = None
+        while True:
+            try:
+                message = autoplay.updates.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "state":
+                latest = message #states the display didn't get to in time are skipped
             else:
-                file.write(f"Graph remained connected.\n")
-
-            file.write(f"=== Automation concluded in {elapsedTime:.2f} seconds. End of log. ===")
-            file.close()
+                done = message
+
+        if latest is not None:
+            _, state, stats, step = latest
+            self.renderer.draw(state)
+            self.show_stats(stats)
+            steps = step - autoplay.first_step
+            rate = steps / max(time.perf_counter() - autoplay.started, 1e-9)
+            self.autoplay_progress.config(value=steps)
+            self.autoplay_status.config(text=f"Step {step}: {rate:.0f} steps/s" + (" (paused)" if autoplay.paused else ""))
+
+        if done is None:
+            self.root.after(AUTOPLAY_POLL_MS, self.poll_autoplay)
+            return
 
-            print(f"=== Automation concluded {elapsedTime:.2f} seconds ===")
+        _, summary, error = done
+        self.autoplay = None
+        self.set_autoplay_controls(False)
+        self.draw_graph() #the worker has finished, the simulator is safe to read again
+        if error is not None:
+            self.autoplay_status.config(text="Autoplay failed")
+            messagebox.showerror("Autoplay failed", str(error))
+        elif summary is None:
+            self.autoplay_status.config(text=f"Autoplay cancelled at step {self.simulator.step}")
+        else:
+            self.autoplay_progress.config(value=self.autoplay_progress.cget("maximum"))
+            self.autoplay_status.config(text=f"Autoplay finished in {summary['elapsed_time']:.2f} s")
+
+    def show_stats(self, stats):
+        #labels from a Simulator.stats() dict, for when the simulator itself is busy on the autoplay thread
+        self.warning_label.config(text="" if stats["connected"] else "Warning: The graph is disconnected!")
+        self.highest_delta_label.config(text=f"Highest Delta: {stats['max_delta']}")
+        self.nodenumber.config(text=f"Number of Nodes: {stats['nodes']}")
+        self.highest_degree_label.config(text=f"Highest Degree: {stats['max_degree']}")
+        self.nodecount_label.config(text=f"Node Count: {stats['nodes']}")
+
+    def toggle_pause(self):
+        if self.autoplay is None:
+            return
+        if self.autoplay.paused:
+            self.autoplay.resume()
+            self.pause_button.config(text="Pause")
+        else:
+            self.autoplay.pause()
+            self.pause_button.config(text="Resume")
+            self.autoplay_status.config(text=f"Paused at step {self.autoplay.last_step}")
+
+    def cancel_autoplay(self):
+        if self.autoplay is not None:
+            self.autoplay.cancel()
+            self.autoplay_status.config(text="Cancelling...")
+
+    def close(self):
+        #let a running autoplay finish its step and close its log and workers before the window goes
+        if self.autoplay is not None:
+            self.autoplay.cancel()
+            self.autoplay.thread.join()
+        self.root.destroy()
+
+#runs an autoplay (Simulator.run with frame recording, and optionally phase timings and path metrics) on a background
+#thread, so the window stays responsive and the simulation doesn't wait for the display. the worker only talks to the UI through
+#updates: ("state", snapshot, stats, step) at most AUTOPLAY_FPS times a second, taken between steps so they are
+#consistent, and one ("done", summary, error) at the end. pausing blocks the worker between steps. cancelling stops the
+#run before its next step (summary None), the simulator keeps the run's progress so another autoplay continues it.
+class Autoplay:
+    def __init__(self, simulator, output_dir, profile=False, timings=False, metrics=False, fps=AUTOPLAY_FPS):
+        self.simulator = simulator
+        self.output_dir = output_dir
+        self.profile = profile
+        self.timings = timings
+        self.metrics = metrics
+        self.interval = 1 / fps
+        self.updates = queue.Queue()
+        self.resumed = threading.Event() #cleared while paused
+        self.resumed.set()
+        self.stopped = threading.Event()
+        self.first_step = self.last_step = simulator.step
+        self.started = time.perf_counter()
+        self.last_update = 0.0
+        self.thread = threading.Thread(target=self.work, daemon=True)
+
+    @property
+    def paused(self):
+        return not self.resumed.is_set()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.thread.start()
+
+    def pause(self):
+        self.resumed.clear()
+
+    def resume(self):
+        self.resumed.set()
+
+    def cancel(self):
+        self.stopped.set()
+        self.resumed.set() #a paused worker has to wake up to notice
+
+    def __call__(self, simulator, event): #observer hook, runs on the worker thread
+        if event != "step":
+            return
+        self.last_step = simulator.step
+        now = time.perf_counter()
+        if now - self.last_update >= self.interval:
+            self.last_update = now
+            self.updates.put(("state", snapshot(simulator), simulator.last_stats, simulator.step))
+        self.resumed.wait()
+
+    def work(self):
+        simulator = self.simulator
+        summary = error = None
+        #with timings, every phase of every step is timed, per-step timings go next to the log and the breakdown is
+        #logged at the end. with metrics, stretch, path length and diameter are sampled about 50 times over the run
+        timer = PhaseTimer() if self.timings else None
+        simulator.timer = timer
+        try:
+            with ExitStack() as stack:
+                if self.profile:
+                    stack.enter_context(profiled("automatic_log_output.prof")) #entered here, cProfile only sees its own thread
+                recorder = FrameRecorder(simulator, frames_dir=self.output_dir, timer=timer)
+                stack.callback(lambda: recorder.close(discard=self.stopped.is_set())) #a cancelled run doesn't wait for its backlog of frames
+                observers = [recorder]
+                if self.metrics:
+                    observers.append(stack.enter_context(PathMetrics(simulator, every=max(1, len(simulator.G) // 50), workers=1, path="automatic_metrics.csv", timer=timer)))
+                observers.append(self) #last, so a pause holds the worker after everything else has seen the step
+                for observer in observers:
+                    simulator.add_observer(observer)
+                try:
+                    summary = simulator.run(strategy="random", log_path="automatic_log_output.jsonl", stop=self.stopped)
+                finally:
+                    for observer in observers:
+                        simulator.remove_observer(observer)
+            if timer:
+                timer.write("automatic_timings.csv")
+                logger.info("Time per phase:\n%s", timer.format_breakdown())
+        except Exception as e: #reported by the UI
+            logger.exception("Autoplay failed")
+            error = e
+        finally:
+            simulator.timer = None
+            self.updates.put(("done", summary, error))
 
 #main control loop
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s") #set to logging.DEBUG for per-node DASH output
     root = tk.Tk()
     app = NetGraph(root)
     root.mainloop()
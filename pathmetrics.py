@@ -0,0 +1,253 @@
+import csv
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import statistics
+
+import numpy as np
+
+from arraygraph import ArrayGraph
+
+logger = logging.getLogger(__name__)
+
+#sampled distance metrics for healed graphs: stretch (how much longer a path is than it was in the original graph), the
+#average path length and bounds on the diameter. exact all pairs shortest paths cost O(n*m), so every `every` steps a
+#few random source nodes run one BFS each in the current graph and compare their distances to every other alive node
+#with the distances they had in the original graph (the graph the metrics started from). original distances are
+#computed once per source and cached, and a source is only replaced once it has been deleted. the BFS runs in worker
+#processes on a snapshot of the edge list, so a measurement costs the simulation one snapshot and is O(sources*m) of
+#background work. estimates come with normal approximation confidence intervals over the sampled sources.
+
+FIELDS = ("step", "nodes", "sources", "pairs", "stretch_mean", "stretch_ci", "stretch_max", "path_mean", "path_ci",
+          "disconnected_pairs", "diameter_lower", "diameter_upper", "original_diameter_lower")
+
+worker_original = None #CSR of the original graph, one copy per worker process
+
+def init_worker(size, edges):
+    global worker_original
+    worker_original = csr(size, edges)
+
+def csr(size, edges):
+    #(indptr, indices) adjacency of the nodes 0..size-1 with both directions of every edge of a (k, 2) array
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    sources = np.concatenate((edges[:, 0], edges[:, 1]))
+    targets = np.concatenate((edges[:, 1], edges[:, 0]))
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+    return indptr, targets[np.argsort(sources, kind='stable')]
+
+def bfs(graph, source):
+    #hop distance from source to every node (-1 if unreachable), one vectorised step per BFS level
+    indptr, indices = graph
+    distance = np.full(len(indptr) - 1, -1, dtype=np.int32)
+    distance[source] = 0
+    frontier = np.array([source], dtype=np.int64)
+    depth = 0
+    while len(frontier):
+        depth += 1
+        starts = indptr[frontier]
+        counts = indptr[frontier + 1] - starts
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        neighbours = indices[np.repeat(starts, counts) + offsets]
+        frontier = np.unique(neighbours[distance[neighbours] < 0])
+        distance[frontier] = depth
+    return distance
+
+def measure(size, edges, alive, sources, original):
+    #per source statistics in the graph given by edges. original[i] is the cached original distance array of sources[i]
+    #or None, the ones computed here are returned as well so the caller can cache them
+    current = csr(size, edges)
+    results = []
+    computed = {}
+    for source, before in zip(sources, original):
+        if before is None:
+            before = computed[source] = bfs(worker_original, source)
+        after = bfs(current, source)
+        targets = alive & (before > 0) #pairs that were connected in the original graph (the source itself has 0)
+        now = after[targets]
+        reachable = now > 0
+        ratio = now[reachable] / before[targets][reachable]
+        results.append({
+            "pairs": int(targets.sum()),
+            "connected": int(reachable.sum()),
+            "stretch_mean": float(ratio.mean()) if len(ratio) else math.nan,
+            "stretch_max": float(ratio.max()) if len(ratio) else math.nan,
+            "path_mean": float(now[reachable].mean()) if len(ratio) else math.nan,
+            "component": int((after >= 0).sum()),
+            "eccentricity": int(after.max()),
+            "original_eccentricity": int(before.max()),
+        })
+    return results, computed
+
+def estimate(values, z):
+    #mean and confidence half width of the defined values, None where there are too few
+    values = [value for value in values if not math.isnan(value)]
+    if not values:
+        return None, None
+    if len(values) == 1:
+        return values[0], None
+    return statistics.fmean(values), z * statistics.stdev(values) / math.sqrt(len(values))
+
+def summarise(step, nodes, results, confidence):
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    stretch_mean, stretch_ci = estimate([result["stretch_mean"] for result in results], z)
+    path_mean, path_ci = estimate([result["path_mean"] for result in results], z)
+    pairs = sum(result["pairs"] for result in results)
+    spanning = [result["eccentricity"] for result in results if result["component"] == nodes]
+    return {
+        "step": step,
+        "nodes": nodes,
+        "sources": len(results),
+        "pairs": pairs,
+        "stretch_mean": stretch_mean,
+        "stretch_ci": stretch_ci,
+        "stretch_max": max((result["stretch_max"] for result in results if result["connected"]), default=None),
+        "path_mean": path_mean,
+        "path_ci": path_ci,
+        "disconnected_pairs": 1 - sum(result["connected"] for result in results) / pairs if pairs else 0.0,
+        "diameter_lower": max((result["eccentricity"] for result in results), default=0), #no pair is further apart than the diameter
+        "diameter_upper": 2 * min(spanning) if spanning else None, #d(u, v) <= d(u, s) + d(s, v), only while connected
+        "original_diameter_lower": max((result["original_eccentricity"] for result in results), default=0),
+    }
+
+def edge_array(G):
+    if isinstance(G, ArrayGraph):
+        return np.concatenate(G.edge_arrays())
+    return np.array(G.edges(), dtype=np.int64).reshape(-1, 2)
+
+#observer that measures every every-th simulation step:
+#   with PathMetrics(simulator, every=1000, sources=32, path="metrics.csv") as metrics:
+#       simulator.add_observer(metrics)
+#       simulator.run()
+#rows (one dict per measurement, see FIELDS) are collected in metrics.rows and written to path on close. workers=0
+#measures in the calling process, which is slower but deterministic in timing and needs no process pool.
+class PathMetrics:
+    def __init__(self, simulator, every=1000, sources=32, confidence=0.95, workers=None, path=None, seed=None, timer=None):
+        if not 0 < confidence < 1:
+            raise ValueError("confidence must be between 0 and 1.")
+        self.every = max(1, int(every))
+        self.samples = max(1, int(sources))
+        self.confidence = confidence
+        self.workers = max(1, (os.cpu_count() or 2) - 1) if workers is None else workers
+        self.path = path
+        self.rng = random.Random(seed) #own generator, measuring must not change the simulator's choices
+        self.timer = timer #optional phasetimer.PhaseTimer, the snapshot and hand over count as metrics
+        self.rows = []
+        self.pending = [] #(step, nodes, async results) in submission order
+        self.pool = None
+        self.start(simulator)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __call__(self, simulator, event): #observer hook
+        if event == "generate":
+            self.collect(wait=True)
+            self.start(simulator)
+        elif event == "step":
+            if simulator.step // self.every > self.last_step // self.every: #every every-th step, also when rounds skip it
+                self.record(simulator)
+            self.last_step = simulator.step
+
+    def start(self, simulator):
+        #the current graph becomes the original graph distances are compared against
+        G = simulator.G
+        self.size = G.n if isinstance(G, ArrayGraph) else max(G.nodes(), default=-1) + 1
+        self.last_step = simulator.step
+        self.sources = []
+        self.cache = {} #source -> distances in the original graph
+        edges = edge_array(G)
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.workers:
+            #spawned like the frame workers, so a Tk session in the parent is never copied into them
+            self.pool = multiprocessing.get_context("spawn").Pool(self.workers, initializer=init_worker, initargs=(self.size, edges))
+        else:
+            init_worker(self.size, edges)
+
+    def pick(self, G, k, taken):
+        #k random alive nodes that are not in taken
+        if isinstance(G, ArrayGraph) and 2 * (k + len(taken)) < len(G):
+            picked = {}
+            while len(picked) < k:
+                node = G.random_node(self.rng)
+                if node not in taken:
+                    picked[node] = None
+            return list(picked)
+        return self.rng.sample([node for node in G.nodes() if node not in taken], k)
+
+    def record(self, simulator):
+        start = self.timer.start() if self.timer else None
+        self.collect()
+        G = simulator.G
+        self.sources = [source for source in self.sources if source in G]
+        for source in set(self.cache) - set(self.sources):
+            del self.cache[source]
+        self.sources += self.pick(G, min(self.samples, len(G)) - len(self.sources), set(self.sources))
+
+        edges = edge_array(G)
+        if isinstance(G, ArrayGraph):
+            alive = G.alive.copy()
+        else:
+            alive = np.zeros(self.size, dtype=bool)
+            alive[list(G.nodes())] = True
+        chunks = [self.sources[i::max(1, self.workers)] for i in range(min(max(1, self.workers), len(self.sources)))]
+        tasks = [(self.size, edges, alive, chunk, [self.cache.get(source) for source in chunk]) for chunk in chunks]
+        if self.pool is not None:
+            results = [self.pool.apply_async(measure, task) for task in tasks]
+        else:
+            results = [measure(*task) for task in tasks]
+        self.pending.append((simulator.step, len(G), results))
+        if self.pool is None:
+            self.collect()
+        if self.timer:
+            self.timer.stop("metrics", start)
+
+    def collect(self, wait=False):
+        #summarises finished measurements in order, waiting for the unfinished ones too with wait
+        while self.pending:
+            step, nodes, results = self.pending[0]
+            if self.pool is not None:
+                if not wait and not all(result.ready() for result in results):
+                    return
+                results = [result.get() for result in results]
+            self.pending.pop(0)
+            per_source = []
+            for source_results, computed in results:
+                per_source += source_results
+                for source, distances in computed.items():
+                    if source in self.sources: #not replaced in the meantime
+                        self.cache[source] = distances
+            self.rows.append(summarise(step, nodes, per_source, self.confidence))
+            logger.debug("Metrics at step %s: %s", step, self.rows[-1])
+
+    def close(self):
+        if self.pool is not None:
+            try:
+                self.collect(wait=True)
+            finally:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+        if self.path is not None:
+            self.write(self.path)
+        return self.rows
+
+    def write(self, path):
+        #the rows as JSON for a .json path and CSV otherwise
+        if path.lower().endswith(".json"):
+            with open(path, "w", encoding='utf-8') as file:
+                json.dump(self.rows, file, separators=(',', ':'))
+        else:
+            with open(path, "w", newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=FIELDS)
+                writer.writeheader()
+                writer.writerows(self.rows)
@@ -0,0 +1,96 @@
+import cProfile
+import csv
+import json
+import logging
+import time
+from array import array
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("deletion", "partition", "dash_tree", "edge_insertion", "connectivity", "max_stats", "relax", "metrics", "draw", "savefig")
+
+#per-phase wall clock timers and call counters for a run. the simulator, dash.dash, the renderer and the frame recorder
+#each hold an optional timer (None by default) and only touch the clock when one is attached, so a run without a
+#timer pays one attribute check per phase. timed code chains its phases:
+#   start = timer.start() if timer else None
+#   ...partition...
+#   if timer: start = timer.stop("partition", start)
+#   ...deletion...
+#   if timer: timer.stop("deletion", start)
+#times are summed per step (Simulator.run calls end_step) and kept in flat arrays, one entry per step and phase, so
+#even million step runs can be exported without keeping a dict per step around.
+class PhaseTimer:
+    def __init__(self):
+        self.current = dict.fromkeys(PHASES, 0.0) #seconds spent in each phase during the current step
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.steps = array('q')
+        self.series = {phase: array('d') for phase in PHASES} #per-step seconds
+
+    def start(self):
+        return time.perf_counter()
+
+    def stop(self, phase, start):
+        #adds the time since start to phase and returns the current time, which is the start of the next phase
+        now = time.perf_counter()
+        self.current[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def end_step(self, step):
+        self.steps.append(step)
+        for phase, seconds in self.current.items():
+            self.series[phase].append(seconds)
+            self.current[phase] = 0.0
+
+    def rows(self):
+        for i, step in enumerate(self.steps):
+            yield {"step": step, **{phase: self.series[phase][i] for phase in PHASES}}
+
+    def write_csv(self, path):
+        with open(path, "w", newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(("step", *PHASES))
+            for i, step in enumerate(self.steps):
+                writer.writerow((step, *(f"{self.series[phase][i]:.9f}" for phase in PHASES)))
+
+    def write_json(self, path):
+        with open(path, "w", encoding='utf-8') as file:
+            json.dump({"phases": self.breakdown(), "steps": list(self.rows())}, file, separators=(',', ':'))
+
+    def write(self, path):
+        #per-step timings, as JSON for a .json path and CSV otherwise
+        if path.lower().endswith(".json"):
+            self.write_json(path)
+        else:
+            self.write_csv(path)
+
+    def breakdown(self):
+        #totals per phase, including time not yet closed off by end_step
+        totals = {phase: sum(self.series[phase]) + self.current[phase] for phase in PHASES}
+        overall = sum(totals.values()) or 1.0
+        return [{
+            "phase": phase,
+            "calls": self.calls[phase],
+            "total_s": totals[phase],
+            "mean_us": totals[phase] / self.calls[phase] * 1e6 if self.calls[phase] else 0.0,
+            "share": totals[phase] / overall,
+        } for phase in PHASES]
+
+    def format_breakdown(self):
+        lines = [f"{'phase':>15} {'calls':>10} {'total s':>10} {'mean us':>10} {'share':>7}"]
+        for row in self.breakdown():
+            lines.append(f"{row['phase']:>15} {row['calls']:>10} {row['total_s']:>10.3f} {row['mean_us']:>10.1f} {row['share']:>7.1%}")
+        return "\n".join(lines)
+
+#runs the with block under cProfile and dumps the stats to path (view with python -m pstats path, or snakeviz)
+@contextmanager
+def profiled(path):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        logger.info("Profile written to %s", path)
@@ -0,0 +1,233 @@
+from array import array
+
+import numpy as np
+
+#bucket queue over small integer values (node degrees and deltas). keys are grouped into one bucket per value, so
+#setting/incrementing a key is O(1) and asking for the maximum is O(1) amortised: the top pointer only ever walks down
+#over values that some earlier update pushed it past.
+class BucketQueue:
+    def __init__(self, items=()):
+        self.value = {} #key -> current value
+        self.buckets = {} #value -> keys with that value (dict used as an insertion ordered set)
+        self.top = None #upper bound on the current maximum value
+        for key, value in items:
+            self.set(key, value)
+
+    def __len__(self):
+        return len(self.value)
+
+    def __contains__(self, key):
+        return key in self.value
+
+    def __getitem__(self, key):
+        return self.value[key]
+
+    def discard_from_bucket(self, key, value):
+        bucket = self.buckets[value]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[value]
+
+    def set(self, key, value):
+        old = self.value.get(key)
+        if old == value:
+            return
+        if old is not None:
+            self.discard_from_bucket(key, old)
+        self.value[key] = value
+        self.buckets.setdefault(value, {})[key] = None
+        if self.top is None or value > self.top:
+            self.top = value
+
+    def add(self, key, amount=1):
+        self.set(key, self.value[key] + amount)
+
+    def remove(self, key):
+        value = self.value.pop(key, None)
+        if value is not None:
+            self.discard_from_bucket(key, value)
+
+    def max(self, default=0):
+        if not self.value:
+            self.top = None
+            return default
+        while self.top not in self.buckets:
+            self.top -= 1
+        return self.top
+
+    def argmax(self):
+        #key holding the maximum value. ties go to the key that has held that value the longest
+        if not self.value:
+            raise ValueError("argmax of an empty BucketQueue")
+        return next(iter(self.buckets[self.max()]))
+
+    def largest(self, k):
+        #up to k keys with the largest values, highest value first and oldest first within a value
+        keys = []
+        if not self.value:
+            return keys
+        value = self.max()
+        lowest = min(self.buckets)
+        while len(keys) < k and value >= lowest:
+            for key in self.buckets.get(value, ()):
+                if len(keys) == k:
+                    break
+                keys.append(key)
+            value -= 1
+        return keys
+
+    def ordered_keys(self):
+        #every key, grouped by value and oldest first within a value. inserting them in this order rebuilds the same ties
+        return [key for bucket in self.buckets.values() for key in bucket]
+
+#BucketQueue for the integer keys 0..n-1 of an ArrayGraph, built from a numpy array of starting values. instead of a
+#dict per bucket, every bucket is a doubly linked list threaded through flat arrays (next/prev per key), which keeps the
+#per key cost at a few dozen bytes for multi-million node graphs. same interface and the same tie order as BucketQueue.
+class ArrayBucketQueue:
+    def __init__(self, values, keys=None):
+        #keys: the keys to insert, in insertion order (default: all of 0..n-1 in key order). other keys start absent
+        values = np.asarray(values, dtype=np.int64)
+        n = len(values)
+        keys = np.arange(n, dtype=np.int64) if keys is None else np.asarray(keys, dtype=np.int64)
+        self.count = len(keys)
+        present = np.zeros(n, dtype=np.uint8)
+        present[keys] = 1
+        self.present = bytearray(present.tobytes())
+
+        #link keys of equal value in insertion order, like BucketQueue.set called once per key
+        order = keys[np.argsort(values[keys], kind='stable')]
+        ordered = values[order]
+        last = np.ones(len(order), dtype=bool)
+        if len(order):
+            last[:-1] = ordered[1:] != ordered[:-1]
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = last[:-1]
+        following = np.full(n, -1, dtype=np.int64)
+        preceding = np.full(n, -1, dtype=np.int64)
+        following[order[:-1][~last[:-1]]] = order[1:][~last[:-1]]
+        preceding[order[1:][~first[1:]]] = order[:-1][~first[1:]]
+
+        self.value = array('q', values.tobytes())
+        self.next = array('q', following.tobytes())
+        self.prev = array('q', preceding.tobytes())
+        self.head = dict(zip(ordered[first].tolist(), order[first].tolist())) #value -> oldest key with that value
+        self.tail = dict(zip(ordered[last].tolist(), order[last].tolist())) #value -> newest key with that value
+        self.top = int(ordered[-1]) if len(order) else None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        return 0 <= key < len(self.present) and self.present[key] == 1
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self.value[key]
+
+    def discard_from_bucket(self, key, value):
+        before = self.prev[key]
+        after = self.next[key]
+        if before == -1:
+            if after == -1:
+                del self.head[value]
+                del self.tail[value]
+            else:
+                self.head[value] = after
+        else:
+            self.next[before] = after
+        if after == -1:
+            if before != -1:
+                self.tail[value] = before
+        else:
+            self.prev[after] = before
+
+    def append_to_bucket(self, key, value):
+        last = self.tail.get(value)
+        self.prev[key] = -1 if last is None else last
+        self.next[key] = -1
+        if last is None:
+            self.head[value] = key
+        else:
+            self.next[last] = key
+        self.tail[value] = key
+
+    def set(self, key, value):
+        if key in self:
+            old = self.value[key]
+            if old == value:
+                return
+            self.discard_from_bucket(key, old)
+        else:
+            self.present[key] = 1
+            self.count += 1
+        self.value[key] = value
+        self.append_to_bucket(key, value)
+        if self.top is None or value > self.top:
+            self.top = value
+
+    def add(self, key, amount=1):
+        self.set(key, self[key] + amount)
+
+    def remove(self, key):
+        if key in self:
+            self.discard_from_bucket(key, self.value[key])
+            self.present[key] = 0
+            self.count -= 1
+
+    def max(self, default=0):
+        if not self.count:
+            self.top = None
+            return default
+        while self.top not in self.head:
+            self.top -= 1
+        return self.top
+
+    def argmax(self):
+        if not self.count:
+            raise ValueError("argmax of an empty ArrayBucketQueue")
+        return self.head[self.max()]
+
+    def largest(self, k):
+        keys = []
+        if not self.count:
+            return keys
+        value = self.max()
+        lowest = min(self.head)
+        while len(keys) < k and value >= lowest:
+            key = self.head.get(value, -1)
+            while key != -1 and len(keys) < k:
+                keys.append(key)
+                key = self.next[key]
+            value -= 1
+        return keys
+
+    def ordered_keys(self):
+        keys = []
+        for key in self.head.values():
+            while key != -1:
+                keys.append(key)
+                key = self.next[key]
+        return keys
+
+#the alive nodes of a networkx graph in an indexable list, for uniform random picks in O(1) instead of listing every
+#node. removing a node moves the last node into its slot, the same order ArrayGraph keeps for random_node, so both
+#backends pick the same nodes from the same RNG.
+class NodeSampler:
+    def __init__(self, nodes=()):
+        self.order = list(nodes)
+        self.slot = {node: i for i, node in enumerate(self.order)}
+
+    def __len__(self):
+        return len(self.order)
+
+    def remove(self, node):
+        slot = self.slot.pop(node)
+        last = self.order.pop()
+        if last != node:
+            self.order[slot] = last
+            self.slot[last] = slot
+
+    def choice(self, rng):
+        #rng is a random.Random, draws like rng.choice(self.order)
+        return self.order[rng.randrange(len(self.order))]
@@ -0,0 +1,306 @@
+import matplotlib
+import numpy as np
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+
+from arraygraph import ArrayGraph
+
+ISOLATE_COLOUR = (0x51 / 255, 0x51 / 255, 0x51 / 255, 1.0) #'#515151', unconnected nodes get a distinct colour
+NATURAL_COLOUR = (0.3, 0.3, 0.3) #edge colours of the density image, healing edges stay red like the healing lines
+HEALING_COLOUR = (1.0, 0.0, 0.0)
+
+#level of detail, by number of nodes: every node labelled with full size markers up to LABEL_LIMIT, unlabelled shrinking
+#markers and thin edge lines up to DENSITY_LIMIT, and above that a density image with nodes and edges rasterized per
+#pixel (nodes coloured by the highest degree in the pixel, natural edges grey and healing edges red by how many pass)
+LABEL_LIMIT = 200
+DENSITY_LIMIT = 20000
+RASTER_CHUNK = 2_000_000 #points sampled along edges per numpy batch while rasterizing
+RASTER_BUDGET = 20_000_000 #most points sampled along edges per image, beyond it long edges are sampled more sparsely
+
+#lightweight, picklable copy of everything the renderer needs from a Simulator: node ids, positions and attributes as
+#arrays, and natural/healing edges as pairs of indices into those arrays
+def snapshot(simulator):
+    G = simulator.G
+    pos = simulator.pos
+    if isinstance(G, ArrayGraph):
+        return array_snapshot(simulator)
+    nodes = list(G.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+
+    natural = []
+    healing = []
+    for u, v, is_healing in G.edges(data='healing'):
+        (healing if is_healing else natural).append((index[u], index[v]))
+
+    return {
+        "step": simulator.step,
+        "nodes": np.array(nodes),
+        "pos": np.array([pos[node] for node in nodes], dtype=float).reshape(-1, 2),
+        "degree": np.fromiter((simulator.degree_index[node] for node in nodes), dtype=np.int64, count=len(nodes)),
+        "delta": np.fromiter((G.nodes[node]['delta'] for node in nodes), dtype=np.int64, count=len(nodes)),
+        "dashID": np.fromiter((G.nodes[node]['dashID'] for node in nodes), dtype=float, count=len(nodes)),
+        "natural_edges": np.array(natural, dtype=np.int64).reshape(-1, 2),
+        "healing_edges": np.array(healing, dtype=np.int64).reshape(-1, 2),
+    }
+
+def array_snapshot(simulator):
+    #snapshot of an ArrayGraph straight from its arrays
+    G = simulator.G
+    nodes = G.node_array()
+    index = np.full(G.n, -1, dtype=np.int64)
+    index[nodes] = np.arange(len(nodes))
+    natural, healing = G.edge_arrays()
+    return {
+        "step": simulator.step,
+        "nodes": nodes,
+        "pos": np.array(list(map(simulator.pos.__getitem__, nodes.tolist())), dtype=float).reshape(-1, 2),
+        "degree": G.degree_array[nodes],
+        "delta": G.delta[nodes],
+        "dashID": G.dash_id[nodes],
+        "natural_edges": index[natural],
+        "healing_edges": index[healing],
+    }
+
+#pixel (row, column) of every point in an image of shape (height, width) covering extent (x0, x1, y0, y1), with a mask
+#of the points that fall inside it
+def to_pixels(points, shape, extent):
+    height, width = shape
+    x0, x1, y0, y1 = extent
+    column = np.floor((points[:, 0] - x0) / (x1 - x0) * width).astype(np.int64)
+    row = np.floor((points[:, 1] - y0) / (y1 - y0) * height).astype(np.int64)
+    inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+    return row, column, inside
+
+#how many segments (p0[i], p1[i]) pass through every pixel, sampled at about one point per pixel of their length
+def segment_counts(p0, p1, shape, extent):
+    height, width = shape
+    x0, x1, y0, y1 = extent
+    scale = np.array([width / (x1 - x0), height / (y1 - y0)])
+    samples = np.ceil(np.hypot(*((p1 - p0) * scale).T)).astype(np.int64) + 1
+    total = int(samples.sum())
+    if total > RASTER_BUDGET:
+        samples = np.maximum(2, samples * RASTER_BUDGET // total)
+    counts = np.zeros(height * width, dtype=np.float64)
+    ends = np.cumsum(samples)
+    start = 0
+    while start < len(samples):
+        stop = max(start + 1, int(np.searchsorted(ends, ends[start] - samples[start] + RASTER_CHUNK, side='right')))
+        chunk = samples[start:stop]
+        edge = np.repeat(np.arange(start, stop), chunk)
+        t = (np.arange(chunk.sum()) - np.repeat(np.cumsum(chunk) - chunk, chunk)) / np.repeat(np.maximum(chunk - 1, 1), chunk)
+        points = p0[edge] + (p1[edge] - p0[edge]) * t[:, None]
+        row, column, inside = to_pixels(points, shape, extent)
+        counts += np.bincount(row[inside] * width + column[inside], minlength=height * width)
+        start = stop
+    return counts.reshape(shape)
+
+#paints colour over the RGBA image wherever alpha (per pixel) is above zero
+def blend(image, colour, alpha):
+    alpha = alpha[..., None]
+    image[..., :3] = np.asarray(colour) * alpha + image[..., :3] * (1 - alpha)
+    image[..., 3:] = alpha + image[..., 3:] * (1 - alpha)
+
+#view limits that fit a set of positions with a small margin
+def fit_limits(pos):
+    pos = np.asarray(pos, dtype=float).reshape(-1, 2)
+    if len(pos) == 0:
+        return (0.0, 1.0), (0.0, 1.0)
+    low = pos.min(axis=0)
+    high = pos.max(axis=0)
+    margin = np.maximum((high - low) * 0.05, 0.05)
+    return (low[0] - margin[0], high[0] + margin[0]), (low[1] - margin[1], high[1] + margin[1])
+
+#draws a Simulator's graph into one long lived figure. every update moves/recolours the existing artists (node scatter,
+#natural and healing edge LineCollections, labels, density image, colorbar limits) instead of building a new figure,
+#and when the figure is shown on an interactive canvas only the graph artists are blitted over a cached background.
+#how much is drawn depends on the number of nodes, see LABEL_LIMIT and DENSITY_LIMIT.
+#works without a display too (the figure is a plain matplotlib Figure), which is what the frame workers use.
+class GraphRenderer:
+    def __init__(self, figsize=(10, 8), dpi=100, node_size=500, font_size=8, blit=True, label_limit=LABEL_LIMIT, density_limit=DENSITY_LIMIT):
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.ax = self.fig.add_subplot()
+        self.ax.set_axis_off()
+        self.node_size = node_size
+        self.font_size = font_size
+        self.blit = blit
+        self.label_limit = label_limit
+        self.density_limit = density_limit
+        self.mode = None #"labels", "points" or "density", set by draw
+
+        self.colormap = matplotlib.colormaps['coolwarm']
+        self.norm = Normalize(vmin=1, vmax=1)
+        self.scalarmap = ScalarMappable(norm=self.norm, cmap=self.colormap)
+        self.scalarmap.set_array([])
+        colorbar = self.fig.colorbar(self.scalarmap, ax=self.ax, orientation='horizontal', pad=0.1)
+        colorbar.set_label('Node Degree (Connections per Node)')
+
+        #when blitting, graph artists are animated so a canvas redraw leaves them out of the cached background
+        self.natural_edges = LineCollection([], colors='grey', linewidths=1.0, zorder=1, animated=blit)
+        self.healing_edges = LineCollection([], colors='red', linewidths=1.5, zorder=1.5, animated=blit)
+        self.ax.add_collection(self.natural_edges)
+        self.ax.add_collection(self.healing_edges)
+        self.nodes = self.ax.scatter(np.empty(0), np.empty(0), s=node_size, zorder=2, animated=blit)
+        self.labels = {} #node -> Text artist
+        #added directly instead of through imshow, which would change the limits and aspect of the axes
+        self.density = AxesImage(self.ax, interpolation='nearest', origin='lower', zorder=0.5, animated=blit, visible=False)
+        self.density.set_data(np.zeros((1, 1, 4)))
+        self.ax.add_image(self.density)
+
+        self.canvas = None
+        self.background = None
+        self.draw_connection = None
+        self.timer = None #optional phasetimer.PhaseTimer for the draw and savefig phases
+
+    def attach(self, canvas):
+        #canvas is an interactive canvas for self.fig (e.g. FigureCanvasTkAgg), enables blitting
+        self.canvas = canvas
+        if self.blit:
+            self.draw_connection = canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        #full redraws (first show, resize, colorbar change) refresh the cached background, then repaint the graph on top
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_artists()
+
+    def artists(self):
+        return [self.density, self.natural_edges, self.healing_edges, self.nodes, *self.labels.values()]
+
+    def draw_artists(self):
+        for artist in self.artists():
+            self.ax.draw_artist(artist)
+
+    def set_limits(self, limits):
+        xlim, ylim = limits
+        self.ax.set_xlim(*xlim)
+        self.ax.set_ylim(*ylim)
+
+    def reset(self, simulator):
+        #new graph: drop old labels and fit the view to the new positions
+        self.clear_labels()
+
+        state = snapshot(simulator)
+        self.set_limits(fit_limits(state["pos"]))
+        self.draw(state, full=True)
+
+    def update(self, simulator, full=False):
+        start = self.timer.start() if self.timer else None
+        self.draw(snapshot(simulator), full)
+        if self.timer:
+            self.timer.stop("draw", start)
+
+    def detail(self, count):
+        if count <= self.label_limit:
+            return "labels"
+        if count <= self.density_limit:
+            return "points"
+        return "density"
+
+    def draw(self, state, full=False):
+        pos = state["pos"]
+        degrees = state["degree"]
+        max_degree = int(degrees.max()) if len(degrees) else 1
+        mode = self.detail(len(pos))
+        if mode != self.mode:
+            self.mode = mode
+            full = True #the background may hold artists of the old mode
+
+        #colourmap is based on node degrees. lower bound is 1, upper bound is current maximum degree within the network
+        if max(max_degree, 1) != self.norm.vmax:
+            self.scalarmap.set_clim(1, max(max_degree, 1))
+            full = True #colorbar needs repainting
+
+        if mode == "density":
+            self.nodes.set_offsets(np.empty((0, 2)))
+            self.natural_edges.set_segments([])
+            self.healing_edges.set_segments([])
+            self.draw_density(state)
+        else:
+            colours = self.colormap(self.norm(degrees.astype(float)))
+            colours[degrees == 0] = ISOLATE_COLOUR
+            self.nodes.set_offsets(pos)
+            self.nodes.set_facecolors(colours)
+            self.nodes.set_sizes([self.node_size if mode == "labels" else max(1.0, self.node_size * self.label_limit / len(pos))])
+            self.natural_edges.set_linewidth(1.0 if mode == "labels" else 0.3)
+            self.healing_edges.set_linewidth(1.5 if mode == "labels" else 0.8)
+            self.natural_edges.set_segments(pos[state["natural_edges"]])
+            self.healing_edges.set_segments(pos[state["healing_edges"]])
+            self.density.set_visible(False)
+
+        if mode == "labels":
+            self.update_labels(state)
+        else:
+            self.clear_labels()
+        self.refresh(full)
+
+    def draw_density(self, state):
+        #nodes and edges rasterized into one RGBA image the size of the axes in pixels
+        pos = state["pos"]
+        shape = (max(1, int(self.ax.bbox.height)), max(1, int(self.ax.bbox.width)))
+        extent = (*self.ax.get_xlim(), *self.ax.get_ylim())
+        image = np.zeros((*shape, 4))
+
+        row, column, inside = to_pixels(pos, shape, extent)
+        pixel = row[inside] * shape[1] + column[inside]
+        top = np.zeros(shape[0] * shape[1], dtype=np.int64) #highest degree per pixel
+        np.maximum.at(top, pixel, state["degree"][inside])
+        occupied = np.zeros(shape[0] * shape[1], dtype=bool)
+        occupied[pixel] = True
+        colours = self.colormap(self.norm(top.astype(float)))
+        colours[top == 0] = ISOLATE_COLOUR
+        colours[~occupied] = 0.0
+        image[:] = colours.reshape(*shape, 4)
+
+        for edges, colour, floor in ((state["natural_edges"], NATURAL_COLOUR, 0.15), (state["healing_edges"], HEALING_COLOUR, 0.6)):
+            if len(edges):
+                counts = segment_counts(pos[edges[:, 0]], pos[edges[:, 1]], shape, extent)
+                alpha = np.where(counts > 0, floor + (1 - floor) * np.log1p(counts) / np.log1p(counts.max()), 0.0)
+                blend(image, colour, alpha)
+
+        self.density.set_data(image)
+        self.density.set_extent(extent)
+        self.density.set_visible(True)
+
+    def clear_labels(self):
+        for text in self.labels.values():
+            text.remove()
+        self.labels = {}
+
+    def update_labels(self, state):
+        nodes = state["nodes"].tolist()
+        alive = set(nodes)
+        for node in [node for node in self.labels if node not in alive]: #deleted nodes
+            self.labels.pop(node).remove()
+
+        for node, (x, y), dash_id, delta in zip(nodes, state["pos"].tolist(), state["dashID"].tolist(), state["delta"].tolist()):
+            text = f"nID: {node}\nDashID: {dash_id:.3f}\nDelta: {delta}"
+            label = self.labels.get(node)
+            if label is None:
+                self.labels[node] = self.ax.text(x, y, text, fontsize=self.font_size, ha='center', va='center', zorder=3, animated=self.blit)
+            elif label.get_text() != text: #only touch labels that changed
+                label.set_text(text)
+
+    def refresh(self, full=False):
+        if self.canvas is None: #headless, nothing on screen to update
+            return
+        if not self.blit:
+            self.canvas.draw()
+        elif full or self.background is None:
+            self.canvas.draw() #on_draw grabs the background and paints the graph
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_artists()
+            self.canvas.blit(self.fig.bbox)
+        self.canvas.flush_events()
+
+    def rasterize(self):
+        #current figure as an RGB uint8 array (needs an Agg canvas and no blitting, see framepipeline)
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
+
+    def savefig(self, filename, **kwargs):
+        start = self.timer.start() if self.timer else None
+        self.fig.savefig(filename, **kwargs)
+        if self.timer:
+            self.timer.stop("savefig", start)
@@ -0,0 +1,641 @@
+import argparse
+import logging
+import math
+import os
+import random
+import time
+from contextlib import ExitStack
+
+import networkx as nx
+import numpy as np
+
+import checkpoint
+import dash
+import generators
+import layouts
+from arraygraph import ArrayGraph
+from attacks import StructureTargets
+from connectivity import ArrayConnectivityTracker, ConnectivityTracker
+from eventlog import EventLog
+from phasetimer import PhaseTimer, profiled
+from priorityindex import ArrayBucketQueue, BucketQueue, NodeSampler
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ("random", "max", "maxneighbour", "articulation", "bridge")
+BACKENDS = ("networkx", "array") #graph storage, see arraygraph.py
+
+#headless simulation engine. holds the graph and all DASH state, never creates any Tk widgets or matplotlib figures.
+#rendering (or anything else) can subscribe via add_observer and is called as observer(simulator, event) where event is
+#one of "generate", "delete", "heal" or "step" (end of an automatic deletion+healing iteration)
+class Simulator:
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.observers = []
+
+        self.G = None #g = graph
+        self.pos = {} #dictionary to store node positions (only filled if a layout is requested)
+        self.last_deleted_node = None
+        self.last_deleted_node_neighbours_list = None #contains unique neighbours (not sharing the same dashID) of the last deleted node
+        self.last_deleted_node_healing_neighbours = None #neighbours the last deleted node had via healing edges
+        self.last_new_edges = [] #edges added by the most recent healing step
+        self.healcount = 0
+        self.step = 0 #number of deletions performed on the current graph
+        self.connectivity = None #incremental connected components of self.G
+        self.degree_index = None #node degrees, for max degree queries without scanning the graph
+        self.delta_index = None #node deltas, same for max delta
+        self.node_sampler = None #alive nodes for random picks, networkx backend only (ArrayGraph keeps its own)
+        self.progress = None #running maxima of an unfinished automatic run, see run()
+        self.timer = None #optional phasetimer.PhaseTimer, times every phase of a step when set
+        self.last_deleted_nodes = [] #victims of the last deletion round, see handle_round
+        self.last_round = [] #(hole, neighbours it was healed from) pairs of the last deletion round
+        self.targets = {} #attack -> attacks.StructureTargets, created when an articulation/bridge strategy is first used
+        self.fell_back = False #whether run()'s last victim choice fell back to random nodes (logged, for replay)
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        self.observers.remove(observer)
+
+    def notify(self, event):
+        for observer in self.observers:
+            observer(self, event)
+
+    #layout: False for none, True for the default ("auto": the model's own coordinates if it has any, else the force
+    #layout) or one of layouts.LAYOUTS
+    def generate_graph(self, nodenumber, layout=False, model="geometric", backend="networkx", **params): #for initial generation
+        nodenumber = int(nodenumber)
+        if nodenumber <= 0:
+            raise ValueError("Number of nodes must be positive.")
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown graph backend: {backend}")
+
+        self.pos = {}
+        self.last_deleted_node = None
+        self.last_deleted_node_neighbours_list = None
+        self.last_deleted_node_healing_neighbours = None
+        self.last_new_edges = []
+        self.last_deleted_nodes = []
+        self.last_round = []
+        self.targets = {}
+        self.healcount = 0
+        self.step = 0
+        self.progress = None
+
+        #edges, components and node attributes (delta = 0, dashID = initial_dashID = random float) are built in bulk
+        #with numpy, see generators.py for the models and their parameters
+        graph = generators.generate(model, nodenumber, np.random.default_rng(self.rng.getrandbits(64)), **params)
+        if backend == "array":
+            self.G = ArrayGraph.from_generated(graph) #same node ids and attributes, compact storage
+        else:
+            self.G = generators.to_networkx(graph)
+
+        if backend == "array":
+            self.connectivity = ArrayConnectivityTracker(self.G)
+            self.degree_index = ArrayBucketQueue(self.G.degree_array)
+            self.delta_index = ArrayBucketQueue(self.G.delta)
+            self.node_sampler = None
+        else:
+            self.connectivity = ConnectivityTracker(self.G)
+            self.degree_index = BucketQueue(self.G.degree())
+            self.delta_index = BucketQueue((node, 0) for node in self.G.nodes())
+            self.node_sampler = NodeSampler(self.G.nodes())
+
+        if layout:
+            method = "auto" if layout is True else layout
+            if method == "spring": #networkx's own layout, quadratic per iteration so only for small graphs
+                G = self.G.to_networkx() if isinstance(self.G, ArrayGraph) else self.G
+                self.pos = nx.spring_layout(G, k=0.4, iterations=7, seed=self.rng.randrange(2**32)) #initial node positions are stored in self.pos
+            else:
+                self.pos = layouts.as_dict(layouts.compute_layout(graph, method, np.random.default_rng(self.rng.getrandbits(64))))
+
+        self.notify("generate")
+        return self.G
+
+    #edges created via healing are marked with a 'healing' attribute by dash.dash, and disappear together with their
+    #endpoints when a node is deleted, so there is no separate list to keep in sync
+    def healing_edges(self):
+        return [(u, v) for u, v, healing in self.G.edges(data='healing') if healing]
+
+    def partition(self, node):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        #skip neighbours added via healing edge so we're only left with natural neighbors
+        neighbors = [neighbor for neighbor, attrs in self.G.adj[node].items() if not attrs.get('healing')]
+
+        if debug:
+            logger.debug("Natural Neighbors of deleted node %s: %s", node, neighbors)
+
+        unique_neighbors = self.representatives(neighbors)
+        if debug:
+            logger.debug("Unique neighbors for deleted node %s: %s", node, unique_neighbors)
+        return unique_neighbors
+
+    #one neighbour per dashID, the one with the lowest initial dashID
+    def representatives(self, neighbors):
+        debug = logger.isEnabledFor(logging.DEBUG)
+        # Partitioning the neighbors based on their IDs
+        partitions = {}
+        for neighbor in neighbors:
+            # Assuming each node has a randomly assigned ID
+            node_id = self.G.nodes[neighbor]['dashID']
+            if node_id not in partitions:
+                partitions[node_id] = []
+            partitions[node_id].append(neighbor)
+            if debug:
+                logger.debug("Neighbor %s with dashID %s added to partition", neighbor, node_id)
+
+        # Select unique representatives from each partition
+        unique_neighbors = []
+        for partition_id, partition in partitions.items():
+            # Choose the neighbor with the lowest initial ID
+            representative = min(partition, key=lambda x: self.G.nodes[x]['initial_dashID'])
+            unique_neighbors.append(representative)
+            if debug:
+                logger.debug("Partition %s representatives: %s, selected: %s (via initial ID %s)", partition_id, partition, representative, self.G.nodes[representative]['initial_dashID'])
+        return unique_neighbors
+
+    def get_healing_neighbors(self, node):
+        if self.G is None:
+            logger.debug("Graph is None, returning empty list.")
+            return []
+
+        healing_neighbors = [neighbor for neighbor, attrs in self.G.adj[node].items() if attrs.get('healing')]
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Healing neighbors for node %s: %s", node, healing_neighbors)
+        return healing_neighbors
+
+    def handle_deletion(self, node):
+        logger.debug("==Deletion event: Node %s===", node)
+        timer = self.timer
+        start = timer.start() if timer else None
+        self.last_deleted_node = node
+        self.last_deleted_node_neighbours_list = self.partition(node)
+        self.last_deleted_node_healing_neighbours = self.get_healing_neighbors(node)
+        if timer:
+            start = timer.stop("partition", start)
+
+        neighbours = list(self.G.neighbors(node))
+        self.connectivity.remove_node(node, neighbours)
+        if timer:
+            start = timer.stop("connectivity", start)
+
+        #process healing neighbours (add them to list of deleted node's neighbours and decrement their delta value)
+        for i in self.last_deleted_node_healing_neighbours:
+            self.last_deleted_node_neighbours_list.append(i)
+            self.G.nodes[i]['delta'] -= 1
+            self.delta_index.add(i, -1)
+
+        for i in neighbours:
+            self.degree_index.add(i, -1)
+        self.degree_index.remove(node)
+        self.delta_index.remove(node)
+        if self.node_sampler is not None:
+            self.node_sampler.remove(node)
+        self.G.remove_node(node)
+        for targets in self.targets.values():
+            targets.node_removed(node, neighbours)
+        self.step += 1
+
+        if node in self.pos:
+            del self.pos[node] #remove pos from dictionary
+        if timer:
+            timer.stop("deletion", start)
+        logger.debug("===Deletion conclusion===")
+        self.notify("delete")
+
+    #deletion strategies. choose_node picks the victim of a strategy without deleting it, the delete_* methods pick and
+    #delete and return the deleted node
+    def choose_node(self, strategy="random"):
+        if strategy == "random":
+            return self.random_node()
+        if strategy == "max":
+            return self.degree_index.argmax() #get node with max edge count
+        if strategy == "maxneighbour":
+            max_node = self.degree_index.argmax() #get node with max edge count
+            max_node_neighbours = list(self.G.neighbors(max_node))
+            return self.rng.choice(max_node_neighbours) #raises IndexError if all nodes in graph are isolates
+        if strategy in ("articulation", "bridge"):
+            return self.attack_targets(strategy).take()[0]
+        raise ValueError(f"Unknown deletion strategy: {strategy}")
+
+    def random_node(self):
+        #uniform alive node in O(1) instead of listing every node
+        if isinstance(self.G, ArrayGraph):
+            return self.G.random_node(self.rng)
+        return self.node_sampler.choice(self.rng)
+
+    def next_victim(self, strategy="random"):
+        #the node run() deletes next. targeted strategies have nothing to aim at once every node is an isolate (or no cut
+        #remains), then a random node is taken instead
+        self.fell_back = False
+        try:
+            return self.choose_node(strategy)
+        except IndexError:
+            self.fell_back = True
+            return self.choose_node("random")
+
+    def delete_random_node(self):
+        return self.delete_node("random")
+
+    def delete_max_node(self):
+        return self.delete_node("max")
+
+    def delete_maxneighbour_node(self):
+        return self.delete_node("maxneighbour")
+
+    #structure aware attacks: a cut vertex (its deletion splits the graph), or the better connected endpoint of a bridge.
+    #highest degree first. raise IndexError when the graph has none left (see attacks.py for how targets are found)
+    def attack_targets(self, attack):
+        if attack not in self.targets:
+            self.targets[attack] = StructureTargets(self, attack)
+        return self.targets[attack]
+
+    def delete_articulation_node(self):
+        return self.delete_node("articulation")
+
+    def delete_bridge_node(self):
+        return self.delete_node("bridge")
+
+    def delete_node(self, strategy="random"):
+        node_deletion_target = self.choose_node(strategy)
+        self.handle_deletion(node_deletion_target)
+        return node_deletion_target
+
+    #network healing (singular step) per Degree Assisted Self-Healing algorithm described by Dr Amitabh Trehan
+    def DASH_healingstep(self):
+
+        logger.debug("=== DASH operation %s initiated ===", self.healcount)
+        returned_new_edges = []
+        timer = self.timer
+        self.G, returned_new_edges = dash.dash(self.G, self.last_deleted_node, self.last_deleted_node_neighbours_list, timer=timer)
+        self.record_new_edges(returned_new_edges)
+
+        logger.debug("New edges created in this healing step: %s", returned_new_edges)
+
+        self.last_new_edges = returned_new_edges
+        self.healcount += 1
+        logger.debug("=== DASH operation complete ===")
+        self.notify("heal")
+        return returned_new_edges
+
+    #bookkeeping for edges added by dash.dash: connectivity, deltas and the max indexes
+    def record_new_edges(self, returned_new_edges):
+        timer = self.timer
+        start = timer.start() if timer else None
+        for i, j in returned_new_edges:
+            self.connectivity.add_edge(i, j)
+        if timer:
+            start = timer.stop("connectivity", start)
+        for i, j in returned_new_edges:
+            self.G.nodes[i]['delta'] += 1
+            self.G.nodes[j]['delta'] += 1
+            self.degree_index.add(i)
+            self.degree_index.add(j)
+            self.delta_index.add(i)
+            self.delta_index.add(j)
+        for targets in self.targets.values():
+            targets.edges_added(returned_new_edges)
+        if timer:
+            timer.stop("edge_insertion", start)
+
+    #batched rounds: k nodes fail at once. victims that are adjacent to each other leave one hole in the graph, so their
+    #neighbourhoods are merged (natural neighbours are partitioned together by dashID, healing neighbours all kept) and
+    #every hole is healed with one DASH reconstruction tree. stats and observers run once per round instead of per node:
+    #"round" (victims in last_deleted_nodes, holes and their neighbourhoods in last_round), then "heal"
+    def choose_victims(self, strategy, k):
+        if strategy == "random":
+            if 2 * k < len(self.G):
+                victims = {}
+                while len(victims) < k:
+                    victims[self.random_node()] = None
+                return list(victims)
+            return self.rng.sample(list(self.G.nodes()), k)
+        if strategy == "max":
+            return self.degree_index.largest(k) #the k best connected nodes
+        if strategy == "maxneighbour":
+            max_node_neighbours = list(self.G.neighbors(self.degree_index.argmax()))
+            if not max_node_neighbours:
+                raise IndexError("The node with most connections has no neighbours.")
+            return self.rng.sample(max_node_neighbours, min(k, len(max_node_neighbours)))
+        if strategy in ("articulation", "bridge"):
+            return self.attack_targets(strategy).take(k)
+        raise ValueError(f"Unknown deletion strategy: {strategy}")
+
+    def holes(self, nodes):
+        #victims grouped into connected groups (union-find over edges between victims), in order of first victim
+        parent = {node: node for node in nodes}
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        for node in nodes:
+            for neighbour in self.G.neighbors(node):
+                if neighbour in parent:
+                    parent[find(neighbour)] = find(node)
+        groups = {}
+        for node in nodes:
+            groups.setdefault(find(node), []).append(node)
+        return list(groups.values())
+
+    def handle_round(self, nodes):
+        #deletes nodes at once and heals every hole they leave. returns the edges added by healing
+        logger.debug("==Deletion round: Nodes %s===", nodes)
+        timer = self.timer
+        start = timer.start() if timer else None
+        victims = set(nodes)
+        self.last_round = []
+        for hole in self.holes(nodes):
+            natural = {} #surviving natural neighbours of the whole hole, in order, as an ordered set
+            healing = [] #one entry per healing edge into the hole
+            for member in hole:
+                for neighbour, attrs in self.G.adj[member].items():
+                    if neighbour in victims:
+                        continue
+                    if attrs.get('healing'):
+                        healing.append(neighbour)
+                    else:
+                        natural[neighbour] = None
+            self.last_round.append((hole, self.representatives(list(natural)) + healing))
+            for i in healing: #every healing edge lost lowers the delta of its surviving end
+                self.G.nodes[i]['delta'] -= 1
+                self.delta_index.add(i, -1)
+        if timer:
+            timer.stop("partition", start)
+
+        #the neighbourhoods are fixed now, so the holes are taken out and healed one after another. healing only looks at
+        #surviving nodes, so this ends in the same graph as removing every victim first. it keeps the connectivity
+        #checks local though: each one starts from the neighbours of a single, already healed hole, where searches meet
+        #after a few hops, instead of from neighbours scattered over the whole graph
+        returned_new_edges = []
+        for hole, neighbours in self.last_round:
+            start = timer.start() if timer else None
+            for node in hole:
+                hole_neighbours = list(self.G.neighbors(node))
+                for i in hole_neighbours:
+                    self.degree_index.add(i, -1)
+                self.degree_index.remove(node)
+                self.delta_index.remove(node)
+                if self.node_sampler is not None:
+                    self.node_sampler.remove(node)
+                self.connectivity.remove_node(node, hole_neighbours)
+                self.G.remove_node(node)
+                for targets in self.targets.values():
+                    targets.node_removed(node, hole_neighbours)
+                self.pos.pop(node, None)
+            if timer:
+                timer.stop("deletion", start)
+
+            self.G, hole_edges = dash.dash(self.G, hole[0], neighbours, timer=timer)
+            self.record_new_edges(hole_edges)
+            returned_new_edges.extend(hole_edges)
+
+            start = timer.start() if timer else None
+            self.connectivity.resolve()
+            if timer:
+                timer.stop("connectivity", start)
+
+        logger.debug("New edges created in this round: %s", returned_new_edges)
+        self.step += len(nodes)
+        self.last_deleted_nodes = list(nodes)
+        self.last_deleted_node = nodes[-1]
+        self.last_deleted_node_neighbours_list = None #single step state, rounds keep theirs in last_round
+        self.last_deleted_node_healing_neighbours = None
+        self.last_new_edges = returned_new_edges
+        self.healcount += 1
+        self.notify("round")
+        self.notify("heal")
+        return returned_new_edges
+
+    def delete_round(self, strategy="random", k=1):
+        #deletes and heals k nodes (fewer if the strategy runs out of targets), returns the victims
+        victims = self.choose_victims(strategy, k)
+        self.handle_round(victims)
+        return victims
+
+    def next_round(self, strategy="random", k=1):
+        #the victims of run()'s next round, random ones if the strategy has nothing to aim at
+        self.fell_back = False
+        try:
+            return self.choose_victims(strategy, k)
+        except IndexError:
+            self.fell_back = True
+            return self.choose_victims("random", k)
+
+    def stats(self):
+        timer = self.timer
+        start = timer.start() if timer else None
+        max_delta = self.delta_index.max()
+        max_degree = self.degree_index.max()
+        if timer:
+            start = timer.stop("max_stats", start)
+        components = self.connectivity.mark_step(self.step)
+        if timer:
+            timer.stop("connectivity", start)
+        return {
+            "nodes": self.G.number_of_nodes(),
+            "max_delta": max_delta,
+            "max_degree": max_degree,
+            "components": components,
+            "connected": self.connectivity.is_connected(),
+            "first_disconnect_step": self.connectivity.first_disconnect_step,
+        }
+
+    def start_progress(self, strategy):
+        #running maxima of an automatic run. kept on the simulator (and saved in checkpoints) so a run can be resumed
+        starting_nodes = self.G.number_of_nodes() + self.step #one node is deleted per step
+        self.progress = {
+            "strategy": strategy,
+            "log_n": 2 * math.log(starting_nodes),
+            "highest_max_delta": 0,
+            "nodes_when_highest_delta": None,
+            "highest_max_degree": 0,
+            "nodes_when_highest_degree": None,
+            "ever_disconnected": False,
+            "nodes_when_first_disconnect": None,
+            "elapsed_time": 0.0,
+        }
+
+    def record_progress(self, stats):
+        #stats is a stats() dict or an event log heal record, both have nodes, max_delta, max_degree and components
+        if self.progress is None:
+            self.start_progress(None)
+        progress = self.progress
+
+        #check cur values exceed max, if so update them
+        if stats["max_delta"] > progress["highest_max_delta"]:
+            progress["highest_max_delta"] = stats["max_delta"]
+            progress["nodes_when_highest_delta"] = stats["nodes"]
+
+        if stats["max_degree"] > progress["highest_max_degree"]:
+            progress["highest_max_degree"] = stats["max_degree"]
+            progress["nodes_when_highest_degree"] = stats["nodes"]
+
+        if stats["components"] > 1 and not progress["ever_disconnected"]:
+            progress["ever_disconnected"] = True
+            progress["nodes_when_first_disconnect"] = stats["nodes"]
+            if self.connectivity.first_disconnect_step is None: #replayed steps don't go through stats()
+                self.connectivity.first_disconnect_step = self.step
+                self.connectivity.first_disconnect_nodes = stats["nodes"]
+            logger.info("Graph is disconnected for the first time! Currently %s nodes remaining.", stats["nodes"])
+
+    def save_checkpoint(self, path):
+        checkpoint.save_checkpoint(self, path)
+
+    @classmethod
+    def from_checkpoint(cls, path, seed=None):
+        return checkpoint.load_checkpoint(path, cls(seed)) #the seed is replaced by the saved RNG state
+
+    #delete nodes, heal, log output until one node is left. good for bulk testing.
+    #a simulator restored from a checkpoint of an unfinished run continues that run (and appends to its event log).
+    #with checkpoint_path, the state is saved before the first step and then every checkpoint_every steps. a {step} in
+    #the path keeps every checkpoint, otherwise the file is overwritten each time.
+    #with batch > 1, every iteration is a round that deletes batch nodes at once and heals them together (see
+    #handle_round), and stats, observers and checkpoints only run between rounds.
+    #stop is an optional threading.Event (or anything with is_set) checked before every step. once it is set the run
+    #returns None and keeps its progress, so calling run again continues it (e.g. a cancelled GUI autoplay).
+    def run(self, strategy="random", log_path=None, checkpoint_path=None, checkpoint_every=1000, batch=1, stop=None):
+        resume = self.progress is not None and self.progress["strategy"] in (None, strategy)
+        if resume:
+            self.progress["strategy"] = strategy
+            logger.info("=== Automation resumed at step %s ===", self.step)
+        else:
+            self.start_progress(strategy)
+            logger.info("=== Automation initiated ===")
+        progress = self.progress
+        progress["batch"] = batch #with the strategy, lets a replay draw the same victims (see checkpoint.replay)
+
+        #one JSON record per deletion and healing step, plus a summary record at the end
+        event_log = EventLog(log_path, append=resume) if log_path else None
+        if event_log is not None:
+            self.add_observer(event_log)
+
+        try:
+            startTime = time.time() - progress["elapsed_time"]
+            if checkpoint_path and not resume:
+                self.save_checkpoint(checkpoint_path.format(step=self.step)) #starting point for replays
+            while len(self.G) > 1:
+                if stop is not None and stop.is_set():
+                    progress["elapsed_time"] = time.time() - startTime
+                    logger.info("=== Automation stopped at step %s ===", self.step)
+                    return None
+                previous_step = self.step
+
+                if batch > 1:
+                    self.handle_round(self.next_round(strategy, min(batch, len(self.G) - 1)))
+                else:
+                    self.handle_deletion(self.next_victim(strategy))
+                    self.DASH_healingstep() #function also updates graph
+
+                #values of current iteration
+                self.last_stats = self.stats()
+                logger.debug("Stats for graph with %s nodes remaining: Current max delta is %s, current max degree is %s.", len(self.G), self.last_stats["max_delta"], self.last_stats["max_degree"])
+                self.record_progress(self.last_stats)
+
+                self.notify("step")
+                if self.timer:
+                    self.timer.end_step(self.step) #after the observers, so drawing counts towards this step
+
+                if checkpoint_path and self.step // checkpoint_every > previous_step // checkpoint_every: #rounds can step over multiples
+                    progress["elapsed_time"] = time.time() - startTime
+                    if event_log is not None:
+                        event_log.flush() #the log has to reach at least as far as the checkpoint
+                    self.save_checkpoint(checkpoint_path.format(step=self.step))
+
+            #when there is one node left
+            endTime = time.time()
+            elapsedTime = endTime - startTime
+
+            summary = {
+                "strategy": strategy,
+                "log_n": progress["log_n"],
+                "highest_max_delta": progress["highest_max_delta"],
+                "nodes_when_highest_delta": progress["nodes_when_highest_delta"],
+                "highest_max_degree": progress["highest_max_degree"],
+                "nodes_when_highest_degree": progress["nodes_when_highest_degree"],
+                "ever_disconnected": progress["ever_disconnected"],
+                "nodes_when_first_disconnect": progress["nodes_when_first_disconnect"],
+                "first_disconnect_step": self.connectivity.first_disconnect_step,
+                "elapsed_time": elapsedTime,
+            }
+            if event_log is not None:
+                event_log.write(dict(event="summary", **summary))
+            self.progress = None #finished, the next run starts over
+        finally:
+            if event_log is not None:
+                self.remove_observer(event_log)
+                event_log.close()
+
+        logger.info("=== Automation concluded %.2f seconds ===", elapsedTime)
+        return summary
+
+#command line entry point: generate -> delete -> DASH heal -> stats without a display
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a headless NetGraph depletion with DASH healing.")
+    parser.add_argument("-n", "--nodes", type=int, default=None, help="number of nodes in the generated graph")
+    parser.add_argument("-s", "--strategy", choices=STRATEGIES, default="random", help="deletion strategy")
+    parser.add_argument("-m", "--model", choices=generators.MODELS, default="geometric", help="random graph model of the starting graph")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="networkx", help="graph storage: networkx, or compact numpy arrays for very large graphs")
+    parser.add_argument("--seed", type=int, default=None, help="seed for graph generation and deletion choices")
+    parser.add_argument("--batch", type=int, default=1, help="nodes deleted at once per round, healed together in one DASH pass")
+    parser.add_argument("--log", default="automatic_log_output.jsonl", help="path of the JSONL event log (empty string disables it)")
+    parser.add_argument("--checkpoint", default=None, help="save the run state to this .npz file (a {step} in the name keeps one file per checkpoint)")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="steps between checkpoints")
+    parser.add_argument("--resume", default=None, help="continue the run saved in this checkpoint instead of generating a graph")
+    parser.add_argument("--video", default=None, help="render frames in the background and encode them to this .gif/.mp4 file")
+    parser.add_argument("--layout", choices=layouts.LAYOUTS, default="auto", help="node positions for rendering (auto: the model's coordinates if it has any, else a force layout)")
+    parser.add_argument("--relax", action="store_true", help="after every healing step, relax the layout around the new edges")
+    parser.add_argument("--frames-dir", default=None, help="also write every rendered frame as a PNG into this folder")
+    parser.add_argument("--stride", type=int, default=1, help="render every k-th step")
+    parser.add_argument("--dpi", type=int, default=100, help="frame resolution (pixels per inch of a 10x8 inch figure)")
+    parser.add_argument("--fps", type=float, default=2, help="frame rate of the encoded video")
+    parser.add_argument("--metrics", default=None, help="estimate stretch, path length and diameter from sampled BFS and write them to this .csv/.json file")
+    parser.add_argument("--metrics-every", type=int, default=1000, help="steps between metric measurements")
+    parser.add_argument("--metrics-sources", type=int, default=32, help="BFS sources sampled per measurement")
+    parser.add_argument("--confidence", type=float, default=0.95, help="confidence level of the metric intervals")
+    parser.add_argument("--timings", default=None, help="time every phase of every step, write them to this .csv/.json file and print a breakdown")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile and write the stats next to the event log (.prof)")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="-v for progress messages, -vv for per-node debug output")
+    args = parser.parse_args(argv)
+    if args.nodes is None and args.resume is None:
+        parser.error("one of -n/--nodes or --resume is required")
+
+    logging.basicConfig(level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbose, 2)], format="%(message)s")
+
+    rendering = args.video or args.frames_dir
+    simulator = Simulator(seed=args.seed)
+    if rendering and args.relax:
+        simulator.add_observer(layouts.IncrementalLayout()) #added first, so frames show the relaxed positions
+    if args.resume:
+        checkpoint.load_checkpoint(args.resume, simulator)
+        simulator.notify("generate") #observers start from the restored graph
+    else:
+        simulator.generate_graph(args.nodes, layout=args.layout if rendering else False, model=args.model, backend=args.backend)
+    run_options = dict(strategy=args.strategy, log_path=args.log or None, checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every, batch=args.batch)
+    if args.timings:
+        simulator.timer = PhaseTimer()
+
+    with ExitStack() as stack:
+        if args.profile:
+            stack.enter_context(profiled(os.path.splitext(args.log or "automatic_log_output.jsonl")[0] + ".prof"))
+        if rendering:
+            from framepipeline import FrameRecorder #keeps matplotlib out of plain headless runs
+            recorder = stack.enter_context(FrameRecorder(simulator, video_path=args.video, frames_dir=args.frames_dir, stride=args.stride, dpi=args.dpi, fps=args.fps, timer=simulator.timer, block=True)) #a requested video gets every stride-th step
+            simulator.add_observer(recorder)
+        if args.metrics:
+            from pathmetrics import PathMetrics
+            metrics = stack.enter_context(PathMetrics(simulator, every=args.metrics_every, sources=args.metrics_sources, confidence=args.confidence, path=args.metrics, seed=args.seed, timer=simulator.timer))
+            simulator.add_observer(metrics)
+        summary = simulator.run(**run_options)
+
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    if args.timings:
+        simulator.timer.write(args.timings)
+        print(simulator.timer.format_breakdown())
+    return summary
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import csv
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+import generators
+from lockstep import LOCKSTEP_STRATEGIES, LockstepBatch
+from simulator import BACKENDS, STRATEGIES, Simulator
+
+logger = logging.getLogger(__name__)
+
+#batch runner for Monte Carlo experiments: many independent generate -> deplete -> heal trials over a grid of node
+#counts and deletion strategies, spread over a process pool. every trial gets its own seed derived from the base seed
+#and its grid position, so any single trial can be rerun on its own with Simulator(seed=trial["seed"]).
+#with engine="lockstep", trials of the same node count, strategy and model run LOCKSTEP_BATCH at a time in one
+#lockstep.LockstepBatch, which runs small graphs several times faster and gives the same results for the random strategy.
+
+ENGINES = ("simulator", "lockstep")
+LOCKSTEP_BATCH = 250 #trials per lockstep batch, bigger batches mean fewer, longer pool tasks
+
+def trial_seed(base_seed, nodes, strategy, repeat):
+    #string seeding goes through sha512, so this is stable across processes and python versions
+    return random.Random(f"{base_seed}:{nodes}:{strategy}:{repeat}").getrandbits(63)
+
+def trial_grid(node_counts, strategies, repeats, base_seed=0, model="geometric", backend="networkx"):
+    for nodes, strategy, repeat in itertools.product(node_counts, strategies, range(repeats)):
+        yield {
+            "model": model,
+            "backend": backend,
+            "nodes": nodes,
+            "strategy": strategy,
+            "repeat": repeat,
+            "seed": trial_seed(base_seed, nodes, strategy, repeat),
+        }
+
+def run_trial(spec):
+    simulator = Simulator(seed=spec["seed"])
+    simulator.generate_graph(spec["nodes"], model=spec.get("model", "geometric"), backend=spec.get("backend", "networkx"))
+    steps = len(simulator.G) - 1
+    summary = simulator.run(strategy=spec["strategy"])
+
+    result = dict(spec)
+    result.update(summary)
+    result["steps"] = steps
+    result["time_per_step"] = summary["elapsed_time"] / steps if steps else 0.0
+    result["engine"] = "simulator"
+    return result
+
+def run_batch(specs):
+    #trials that share nodes, strategy and model, run together in one LockstepBatch
+    first = specs[0]
+    batch = LockstepBatch.generate(first["nodes"], [spec["seed"] for spec in specs], model=first.get("model", "geometric"))
+    results = []
+    for spec, summary, nodes in zip(specs, batch.run(first["strategy"]), batch.starting_nodes.tolist()):
+        steps = max(nodes - 1, 0)
+        result = dict(spec)
+        result.update(summary)
+        result["steps"] = steps
+        result["time_per_step"] = summary["elapsed_time"] / steps if steps else 0.0
+        result["engine"] = "lockstep"
+        results.append(result)
+    return results
+
+def lockstep_batches(specs, size=LOCKSTEP_BATCH):
+    groups = {}
+    for spec in specs:
+        groups.setdefault((spec["nodes"], spec["strategy"], spec.get("model", "geometric")), []).append(spec)
+    for group in groups.values():
+        for i in range(0, len(group), size):
+            yield group[i:i + size]
+
+def run_trials(specs, out_path, workers=None, engine="simulator"):
+    #results are appended to out_path (JSONL) as soon as each trial (lockstep: each batch) finishes, in completion order
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    workers = workers or os.cpu_count() or 1
+    results = []
+    with open(out_path, "w", encoding='utf-8') as file, multiprocessing.Pool(workers) as pool:
+        if engine == "lockstep":
+            finished = itertools.chain.from_iterable(pool.imap_unordered(run_batch, list(lockstep_batches(specs))))
+        else:
+            finished = pool.imap_unordered(run_trial, specs)
+        for result in finished:
+            file.write(json.dumps(result) + "\n")
+            file.flush()
+            results.append(result)
+            logger.info("trial done: %s nodes, %s, repeat %s (max delta %s, 2 log n %.2f)", result["nodes"], result["strategy"], result["repeat"], result["highest_max_delta"], result["log_n"])
+    return results
+
+def load_results(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+def summarise(results):
+    groups = {}
+    for result in results:
+        groups.setdefault((result["nodes"], result["strategy"]), []).append(result)
+
+    rows = []
+    for (nodes, strategy), group in sorted(groups.items()):
+        max_deltas = [r["highest_max_delta"] for r in group]
+        disconnects = [r["nodes_when_first_disconnect"] / nodes for r in group if r["ever_disconnected"]]
+        rows.append({
+            "nodes": nodes,
+            "strategy": strategy,
+            "trials": len(group),
+            "two_log_n": 2 * math.log(nodes),
+            "max_delta_mean": statistics.fmean(max_deltas),
+            "max_delta_max": max(max_deltas),
+            "max_delta_over_2logn": max(max_deltas) / (2 * math.log(nodes)) if nodes > 1 else 0.0,
+            "max_degree_mean": statistics.fmean(r["highest_max_degree"] for r in group),
+            "disconnected_fraction": len(disconnects) / len(group),
+            "first_disconnect_remaining_mean": statistics.fmean(disconnects) if disconnects else None, #as a fraction of the starting node count
+            "time_per_step_mean": statistics.fmean(r["time_per_step"] for r in group),
+        })
+    return rows
+
+def write_summary(rows, path):
+    with open(path, "w", newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def format_summary(rows):
+    columns = list(rows[0])
+    cells = [[f"{row[c]:.4g}" if isinstance(row[c], float) else str(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(line[i]) for line in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.rjust(w) for c, w in zip(columns, widths))]
+    lines.extend("  ".join(cell.rjust(w) for cell, w in zip(line, widths)) for line in cells)
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many independent DASH depletion trials in parallel.")
+    parser.add_argument("-n", "--nodes", type=int, nargs="+", required=True, help="node counts to test")
+    parser.add_argument("-s", "--strategies", nargs="+", choices=STRATEGIES, default=None, help="deletion strategies to test (default: all the engine supports)")
+    parser.add_argument("-m", "--model", choices=generators.MODELS, default="geometric", help="random graph model of the starting graphs")
+    parser.add_argument("-b", "--backend", choices=BACKENDS, default="networkx", help="graph storage, array is much leaner for large graphs")
+    parser.add_argument("-e", "--engine", choices=ENGINES, default="simulator", help="lockstep runs many small trials together in numpy arrays (random, max and maxneighbour only)")
+    parser.add_argument("-t", "--trials", type=int, default=10, help="trials per (node count, strategy) pair")
+    parser.add_argument("--seed", type=int, default=0, help="base seed, per-trial seeds are derived from it")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("-o", "--out", default="trials.jsonl", help="per-trial results, streamed as trials finish")
+    parser.add_argument("--summary", default="trials_summary.csv", help="aggregated summary table")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every finished trial")
+    args = parser.parse_args(argv)
+    if args.strategies is None:
+        args.strategies = list(LOCKSTEP_STRATEGIES if args.engine == "lockstep" else STRATEGIES)
+    if args.engine == "lockstep" and not set(args.strategies) <= set(LOCKSTEP_STRATEGIES):
+        parser.error(f"the lockstep engine supports the strategies {', '.join(LOCKSTEP_STRATEGIES)}")
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    specs = list(trial_grid(args.nodes, args.strategies, args.trials, args.seed, args.model, args.backend))
+    start = time.time()
+    results = run_trials(specs, args.out, args.workers, args.engine)
+    rows = summarise(results)
+    write_summary(rows, args.summary)
+
+    print(format_summary(rows))
+    print(f"{len(results)} trials in {time.time() - start:.2f} seconds")
+    return rows
+
+if __name__ == "__main__":
+    main()